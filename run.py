@@ -7,19 +7,23 @@ Launch Script
 
 import sys
 import os
+import multiprocessing
 
 # 添加src目录到Python路径
 current_dir = os.path.dirname(os.path.abspath(__file__))
 src_dir = os.path.join(current_dir, 'src')
 sys.path.insert(0, src_dir)
 
-try:
-    from main import main
-    main()
-except ImportError as e:
-    print(f"导入错误: {e}")
-    print("请确保已安装所有依赖包:")
-    print("pip install -r requirements.txt")
-except Exception as e:
-    print(f"运行错误: {e}")
-    input("按回车键退出...")
\ No newline at end of file
+# 扫描器会使用进程池，子进程导入本模块时不能再次启动界面
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    try:
+        from main import main
+        main()
+    except ImportError as e:
+        print(f"导入错误: {e}")
+        print("请确保已安装所有依赖包:")
+        print("pip install -r requirements.txt")
+    except Exception as e:
+        print(f"运行错误: {e}")
+        input("按回车键退出...")
\ No newline at end of file
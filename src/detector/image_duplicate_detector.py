@@ -6,14 +6,22 @@ Image Duplicate Detector
 """
 
 import os
+import struct
 from typing import List, Dict, Any, Optional, Callable, Tuple
 from collections import defaultdict
 import imagehash
 from PIL import Image
+import cv2
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
 import time
 
+# JPEG中携带图片尺寸的SOF标记（排除DHT、JPG、DAC等同区间的非SOF标记）
+_JPEG_SOF_MARKERS = frozenset({
+    0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+    0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF
+})
+
 class ImageDuplicateDetector:
     """图片重复检测器"""
     
@@ -127,10 +135,21 @@ class ImageDuplicateDetector:
         Returns:
             预筛选后的候选组列表
         """
+        # 先按文件大小分组，文件大小唯一的图片不可能重复
+        size_groups = defaultdict(list)
+        for file_info in image_files:
+            size_groups[file_info['size'] // 1024].append(file_info)  # 按KB分组
+        
+        candidates = [file_info for group in size_groups.values() if len(group) >= 2
+                      for file_info in group]
+        
+        # 只为候选文件读取图片尺寸
+        self._load_image_dimensions(candidates)
+        
         # 使用文件大小和尺寸信息进行预筛选
         metadata_groups = defaultdict(list)
         
-        for file_info in image_files:
+        for file_info in candidates:
             # 创建元数据键：文件大小（相差不超过5%）和尺寸
             size_key = file_info['size'] // 1024  # 按KB分组
             
@@ -149,6 +168,123 @@ class ImageDuplicateDetector:
         # 只保留可能包含重复文件的组（至少有2个文件）
         return [group for group in metadata_groups.values() if len(group) >= 2]
         
+    def _load_image_dimensions(self, image_files: List[Dict[str, Any]]):
+        """
+        并行读取尚未加载尺寸信息的图片（延迟加载）
+        
+        Args:
+            image_files: 图片文件列表
+        """
+        pending = [file_info for file_info in image_files if 'width' not in file_info]
+        if not pending:
+            return
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(self._get_image_dimensions, pending))
+        
+    def _get_image_dimensions(self, file_info: Dict[str, Any]):
+        """
+        读取图片尺寸、格式等信息并写入文件信息字典
+        
+        Args:
+            file_info: 图片文件信息
+        """
+        file_path = file_info['path']
+        
+        # 常见格式直接解析文件头
+        try:
+            header_dims = self._read_header_dims(file_path)
+        except (OSError, struct.error):
+            header_dims = None
+        if header_dims:
+            file_info['width'], file_info['height'], file_info['format'] = header_dims
+            return
+        
+        # 尝试使用PIL获取图片信息（只解析文件头，不解码像素）
+        try:
+            with Image.open(file_path) as img:
+                file_info['width'], file_info['height'] = img.size
+                file_info['format'] = img.format
+                file_info['mode'] = img.mode
+        except Exception as e:
+            # 如果PIL失败，尝试使用OpenCV
+            try:
+                img = cv2.imread(file_path)
+                if img is not None:
+                    height, width = img.shape[:2]
+                    file_info['width'] = width
+                    file_info['height'] = height
+                    file_info['format'] = 'OpenCV'
+            except Exception as cv2_err:
+                print(f"无法获取图片信息 {file_path}: {str(e)}, {str(cv2_err)}")
+        
+    def _read_header_dims(self, file_path: str) -> Optional[Tuple[int, int, str]]:
+        """
+        直接解析文件头获取图片尺寸，支持PNG、JPEG、GIF、BMP、WebP
+        
+        Args:
+            file_path: 图片文件路径
+            
+        Returns:
+            (宽度, 高度, 格式) 元组，无法识别的格式返回None
+        """
+        with open(file_path, 'rb') as f:
+            head = f.read(32)
+            
+            if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+                width, height = struct.unpack('>II', head[16:24])
+                return width, height, 'PNG'
+            
+            if head[:6] in (b'GIF87a', b'GIF89a'):
+                width, height = struct.unpack('<HH', head[6:10])
+                return width, height, 'GIF'
+            
+            if head.startswith(b'BM') and len(head) >= 26:
+                dib_size = struct.unpack('<I', head[14:18])[0]
+                if dib_size == 12:
+                    width, height = struct.unpack('<HH', head[18:22])
+                else:
+                    width, height = struct.unpack('<ii', head[18:26])
+                return width, abs(height), 'BMP'
+            
+            if head[:4] == b'RIFF' and head[8:12] == b'WEBP' and len(head) >= 30:
+                chunk = head[12:16]
+                if chunk == b'VP8X':
+                    width = int.from_bytes(head[24:27], 'little') + 1
+                    height = int.from_bytes(head[27:30], 'little') + 1
+                    return width, height, 'WEBP'
+                if chunk == b'VP8 ':
+                    width, height = struct.unpack('<HH', head[26:30])
+                    return width & 0x3FFF, height & 0x3FFF, 'WEBP'
+                if chunk == b'VP8L':
+                    bits = int.from_bytes(head[21:25], 'little')
+                    return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1, 'WEBP'
+                return None
+            
+            if head[:2] == b'\xff\xd8':
+                # 依次跳过各段，直到找到SOF段
+                f.seek(2)
+                while True:
+                    byte = f.read(1)
+                    while byte and byte != b'\xff':
+                        byte = f.read(1)
+                    while byte == b'\xff':
+                        byte = f.read(1)
+                    if not byte:
+                        return None
+                    
+                    marker = byte[0]
+                    if marker == 0x01 or 0xD0 <= marker <= 0xD9:
+                        continue  # 无长度字段的独立标记
+                    
+                    segment_length = struct.unpack('>H', f.read(2))[0]
+                    if marker in _JPEG_SOF_MARKERS:
+                        height, width = struct.unpack('>xHH', f.read(5))
+                        return width, height, 'JPEG'
+                    f.seek(segment_length - 2, os.SEEK_CUR)
+        
+        return None
+        
     def _parallel_extract_features(self, files_to_process: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]], 
                                  progress_callback: Optional[Callable] = None) -> Dict[int, List[Tuple[Dict[str, Any], str]]]:
         """
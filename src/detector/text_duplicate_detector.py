@@ -6,6 +6,8 @@ Text Duplicate Detector
 """
 
 import re
+import math
+import zlib
 import hashlib
 from typing import List, Dict, Any, Optional, Callable, Set
 from collections import defaultdict, Counter
@@ -15,18 +17,195 @@ from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_compl
 import unicodedata
 import multiprocessing
 
+import numpy as np
+
+from scanner.text_scanner import TextScanner
+
+try:
+    # 可选依赖，C++实现的编辑距离相似度（SIMD加速）
+    from rapidfuzz import fuzz as rf_fuzz, process as rf_process
+except ImportError:
+    rf_fuzz = None
+
+try:
+    # 可选依赖，C++向量化的字符串分词
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+try:
+    from numba import njit  # 可选依赖，将相似度内核编译为机器码
+except ImportError:
+    njit = None
+
+try:
+    # 可选依赖，局部敏感哈希快速找出候选相似文件对
+    from datasketch import MinHash, MinHashLSH, LeanMinHash
+except ImportError:
+    MinHashLSH = None
+
+try:
+    # 可选依赖，稀疏矩阵乘法批量计算相似度
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+    from sklearn.feature_extraction.text import TfidfVectorizer
+except ImportError:
+    TfidfVectorizer = None
+
+# 向量化相似度计算时每次与全体文档相乘的行数，限制相似度矩阵的内存占用
+_TFIDF_BLOCK_ROWS = 1000
+
+# MinHash的排列数和分片长度
+_MINHASH_NUM_PERM = 128
+_SHINGLE_SIZE = 5
+
+# 分词规则：中文按单字切分，其余按连续的字母数字切分
+_TOKEN_RE = re.compile(r'[\u4e00-\u9fff]|[^\W\u4e00-\u9fff]+')
+
+# pyarrow(RE2)分词规则，与_TOKEN_RE等价：先在每个中文字符两侧插入空格，再按非字母数字切分
+_ARROW_CJK_PATTERN = '([\u4e00-\u9fff])'
+_ARROW_SPLIT_PATTERN = r'[^\pL\pN_]+'
+
+# 分句规则
+_SENTENCE_RE = re.compile(r'[。！？.!?]+')
+
+# 序列相似度只比较前若干个词，限制O(n*m)动态规划的规模
+_SEQUENCE_MAX_TOKENS = 2000
+
+
+def _tokenize(content: str) -> np.ndarray:
+    """
+    分词并将每个词映射为CRC32哈希
+    
+    安装了pyarrow时在C++内核中完成切分和去重，只对去重后的词表逐个计算哈希，
+    再按字典编码的下标取出整个词序列；否则逐词正则切分并计算哈希
+    
+    Args:
+        content: 标准化后的文本
+        
+    Returns:
+        词哈希数组（np.uint32）
+    """
+    if pa is not None:
+        spaced = pc.replace_substring_regex(pa.array([content], type=pa.large_string()),
+                                            pattern=_ARROW_CJK_PATTERN, replacement=' \\1 ')
+        words = pc.list_flatten(pc.split_pattern_regex(spaced, pattern=_ARROW_SPLIT_PATTERN))
+        words = words.filter(pc.greater(pc.utf8_length(words), 0))
+        encoded = words.dictionary_encode()
+        vocabulary = encoded.dictionary.to_pylist()
+        hashes = np.fromiter((zlib.crc32(word.encode('utf-8')) for word in vocabulary),
+                             dtype=np.uint32, count=len(vocabulary))
+        return hashes[encoded.indices.to_numpy(zero_copy_only=False)]
+    
+    words = _TOKEN_RE.findall(content)
+    return np.fromiter((zlib.crc32(word.encode('utf-8')) for word in words), 
+                       dtype=np.uint32, count=len(words))
+
+
+def _lcs_ratio(a: np.ndarray, b: np.ndarray) -> float:
+    """
+    基于最长公共子序列的序列相似度（0-1），与SequenceMatcher.ratio的定义一致：2*匹配数/总长度
+    
+    Args:
+        a: 词哈希数组1
+        b: 词哈希数组2
+        
+    Returns:
+        相似度
+    """
+    n, m = len(a), len(b)
+    if n == 0 or m == 0:
+        return 0.0
+    prev = np.zeros(m + 1, dtype=np.int32)
+    curr = np.zeros(m + 1, dtype=np.int32)
+    for i in range(n):
+        ai = a[i]
+        for j in range(m):
+            if ai == b[j]:
+                curr[j + 1] = prev[j] + 1
+            else:
+                curr[j + 1] = max(prev[j + 1], curr[j])
+        prev, curr = curr, prev
+    return 2.0 * prev[m] / (n + m)
+
+
+def _vocab_sim(a: np.ndarray, b: np.ndarray) -> float:
+    """
+    词汇相似度（Jaccard系数，0-1），两个输入均为已排序去重的词哈希数组，归并一遍求交集
+    
+    Args:
+        a: 词汇数组1
+        b: 词汇数组2
+        
+    Returns:
+        相似度
+    """
+    n, m = len(a), len(b)
+    if n == 0 and m == 0:
+        return 0.0
+    i = j = common = 0
+    while i < n and j < m:
+        if a[i] == b[j]:
+            common += 1
+            i += 1
+            j += 1
+        elif a[i] < b[j]:
+            i += 1
+        else:
+            j += 1
+    return common / (n + m - common)
+
+
+def _struct_sim(a: np.ndarray, b: np.ndarray) -> float:
+    """
+    结构特征向量的余弦相似度（0-1）
+    
+    Args:
+        a: 特征向量1
+        b: 特征向量2
+        
+    Returns:
+        相似度
+    """
+    if len(a) != len(b):
+        return 0.0
+    dot = norm_a = norm_b = 0.0
+    for i in range(len(a)):
+        dot += a[i] * b[i]
+        norm_a += a[i] * a[i]
+        norm_b += b[i] * b[i]
+    if norm_a == 0.0 or norm_b == 0.0:
+        return 0.0
+    return dot / (norm_a ** 0.5 * norm_b ** 0.5)
+
+
+if njit is not None:
+    _sequence_sim = njit(cache=True)(_lcs_ratio)
+    _vocab_sim = njit(cache=True)(_vocab_sim)
+    _struct_sim = njit(cache=True)(_struct_sim)
+else:
+    def _sequence_sim(a: np.ndarray, b: np.ndarray) -> float:
+        """未安装numba时逐词动态规划过慢，改用rapidfuzz或SequenceMatcher比较词序列"""
+        if rf_fuzz is not None:
+            return rf_fuzz.ratio(a.tolist(), b.tolist()) / 100
+        return SequenceMatcher(None, a.tolist(), b.tolist(), autojunk=False).ratio()
+
 class TextDuplicateDetector:
     """文本重复检测器（高性能优化版本）"""
     
-    def __init__(self, similarity_threshold: float = 80.0, max_workers: int = None):
+    def __init__(self, similarity_threshold: float = 80.0, max_workers: int = None,
+                 scanner: Optional[TextScanner] = None):
         """
         初始化文本重复检测器
         
         Args:
             similarity_threshold: 相似度阈值（百分比）
             max_workers: 最大工作线程数（None表示自动检测）
+            scanner: 按需加载文件详细信息（哈希、编码）的文本扫描器（None时使用默认设置）
         """
         self.similarity_threshold = similarity_threshold
+        self.scanner = scanner or TextScanner()
         
         # 自动检测最优线程数
         if max_workers is None:
@@ -48,8 +227,7 @@ class TextDuplicateDetector:
         }
         
         # 缓存机制
-        self._hash_cache = {}
-        self._feature_cache = {}
+        self._feature_cache = {}  # 内容哈希 -> _preprocess_text的分析结果
         
     def find_duplicates(self, text_files: List[Dict[str, Any]], 
                        progress_callback: Optional[Callable] = None) -> List[List[Dict[str, Any]]]:
@@ -113,7 +291,7 @@ class TextDuplicateDetector:
     
     def find_exact_duplicates(self, text_files: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
         """
-        查找完全相同的文本文件（基于MD5哈希）- 延迟计算版本
+        查找完全相同的文本文件（基于内容哈希）- 延迟计算版本
         
         Args:
             text_files: 文本文件列表
@@ -121,19 +299,10 @@ class TextDuplicateDetector:
         Returns:
             完全重复的文件组
         """
-        # 避免循环导入，直接实现延迟加载逻辑
-        scanner = None
-        
+        # 大小不同的文件内容不可能完全相同，由扫描器只为大小相同的文件加载详细信息
         hash_groups = defaultdict(list)
-        
-        for file_info in text_files:
-            # 延迟加载文件详细信息
-            if not self._ensure_file_details(file_info):
-                continue
-                
-            content_hash = file_info.get('content_hash', '')
-            if content_hash:
-                hash_groups[content_hash].append(file_info)
+        for file_info in self.scanner.ensure_details_for_duplicates(text_files):
+            hash_groups[file_info['content_hash']].append(file_info)
         
         # 只返回包含多个文件的组
         exact_duplicates = []
@@ -174,6 +343,12 @@ class TextDuplicateDetector:
         if progress_callback:
             progress_callback(60, "正在计算文本相似度...")
         
+        # 优先用MinHash-LSH只挑出候选对再精确比较；其次一次性向量化计算全部文件对；否则逐对比较
+        if MinHashLSH is not None:
+            return self._lsh_similarity_groups(filtered_files, progress_callback)
+        if TfidfVectorizer is not None:
+            return self._tfidf_similarity_groups(filtered_files, progress_callback)
+        
         similar_groups = self._batch_similarity_check(filtered_files, progress_callback)
         
         return similar_groups
@@ -188,30 +363,22 @@ class TextDuplicateDetector:
         Returns:
             过滤后的文件列表
         """
-        # 第一层：按文件大小精确分组（±5%范围内）
-        size_groups = defaultdict(list)
-        
+        # 第一层：按扩展名和文件大小的对数分桶（每桶跨度为√2倍），O(N)完成
+        buckets = defaultdict(list)
         for file_info in text_files:
             size = file_info.get('size', 0)
             if size > 0:
-                # 更精确的大小分组 - 按5%范围分组
-                size_bucket = int(size / (size * 0.05 + 1))  # 5%容差分组
-                size_groups[size_bucket].append(file_info)
+                ext = file_info.get('extension', '').lower()
+                buckets[ext, int(math.log2(size) * 2)].append(file_info)
         
-        # 第二层：按文件扩展名分组
+        # 第二层：大小相差20%以上的文件不可能相似，只有本桶和相邻桶内
+        # 还有其他同扩展名文件时才保留，其余文件直接跳过相似度计算
         filtered_by_size = []
-        for files in size_groups.values():
-            if len(files) > 1:
-                # 按扩展名进一步分组
-                ext_groups = defaultdict(list)
-                for file_info in files:
-                    ext = file_info.get('extension', '').lower()
-                    ext_groups[ext].append(file_info)
-                
-                # 只保留同扩展名且有多个文件的组
-                for ext_files in ext_groups.values():
-                    if len(ext_files) > 1:
-                        filtered_by_size.extend(ext_files)
+        for (ext, key), files in buckets.items():
+            neighbours = (len(files) + len(buckets.get((ext, key - 1), ())) 
+                          + len(buckets.get((ext, key + 1), ())))
+            if neighbours > 1:
+                filtered_by_size.extend(files)
         
         # 第三层：按修改时间快速筛选（相近时间的文件更可能重复）
         if len(filtered_by_size) > 100:  # 只对大数据集应用时间过滤
@@ -251,7 +418,8 @@ class TextDuplicateDetector:
                 return None
             
             # 只提取轻量级特征，不读取完整内容
-            lightweight_features = self._extract_lightweight_features(file_path, file_info.get('encoding', 'utf-8'))
+            encoding = self.scanner.ensure_encoding(file_info)
+            lightweight_features = self._extract_lightweight_features(file_path, encoding)
             if not lightweight_features:
                 return None
             
@@ -450,125 +618,6 @@ class TextDuplicateDetector:
         
         return priority_files
     
-    def _ensure_file_details(self, file_info: Dict[str, Any]) -> bool:
-        """
-        确保文件详细信息已加载（本地实现）
-        
-        Args:
-            file_info: 文件信息字典
-            
-        Returns:
-            是否成功加载详细信息
-        """
-        try:
-            file_path = file_info['path']
-            
-            # 如果已经有详细信息，直接返回
-            if file_info.get('content_hash') is not None:
-                return True
-            
-            # 检测编码
-            if file_info.get('encoding') is None:
-                encoding = self._detect_encoding_fast(file_path)
-                if not encoding:
-                    return False
-                file_info['encoding'] = encoding
-            
-            # 计算哈希
-            if file_info.get('content_hash') is None:
-                content_hash = self._calculate_file_hash_local(file_path, file_info['encoding'])
-                if content_hash is None:
-                    return False
-                file_info['content_hash'] = content_hash
-            
-            return True
-            
-        except Exception as e:
-            print(f"加载文件详细信息失败 {file_info.get('path', 'unknown')}: {e}")
-            return False
-    
-    def _detect_encoding_fast(self, file_path: str) -> Optional[str]:
-        """
-        快速检测文件编码
-        
-        Args:
-            file_path: 文件路径
-            
-        Returns:
-            检测到的编码
-        """
-        try:
-            import chardet
-            
-            # 只读取文件前1KB来检测编码
-            with open(file_path, 'rb') as f:
-                raw_data = f.read(1024)
-                
-            if not raw_data:
-                return 'utf-8'
-            
-            # 首先尝试常见编码
-            for test_encoding in ['utf-8', 'gbk', 'gb2312', 'latin-1']:
-                try:
-                    raw_data.decode(test_encoding)
-                    return test_encoding
-                except UnicodeDecodeError:
-                    continue
-            
-            # 使用chardet检测
-            result = chardet.detect(raw_data)
-            encoding = result.get('encoding', 'utf-8')
-            confidence = result.get('confidence', 0)
-            
-            if confidence < 0.5:
-                return 'utf-8'
-                        
-            return encoding
-            
-        except Exception as e:
-            print(f"编码检测失败 {file_path}: {e}")
-            return 'utf-8'
-    
-    def _calculate_file_hash_local(self, file_path: str, encoding: str) -> Optional[str]:
-        """
-        计算文件内容哈希（带缓存）
-        
-        Args:
-            file_path: 文件路径
-            encoding: 文件编码
-            
-        Returns:
-            文件内容的MD5哈希值
-        """
-        try:
-            # 检查缓存
-            import os
-            stat = os.stat(file_path)
-            cache_key = f"{file_path}:{stat.st_size}:{stat.st_mtime}"
-            
-            if cache_key in self._hash_cache:
-                return self._hash_cache[cache_key]
-            
-            hash_md5 = hashlib.md5()
-            
-            with open(file_path, 'r', encoding=encoding, errors='ignore') as f:
-                # 对大文件只读取前面部分计算哈希
-                max_read = min(stat.st_size, 100000)  # 最多读取100KB
-                content = f.read(max_read)
-                hash_md5.update(content.encode('utf-8'))
-            
-            result = hash_md5.hexdigest()
-            
-            # 缓存结果（限制缓存大小）
-            if len(self._hash_cache) < 1000:
-                self._hash_cache[cache_key] = result
-            
-            return result
-            
-        except Exception as e:
-            print(f"计算文件哈希失败 {file_path}: {e}")
-            return None
-    
     def _batch_similarity_check(self, filtered_files: List[Dict[str, Any]], 
                                progress_callback: Optional[Callable] = None) -> List[List[Dict[str, Any]]]:
         """
@@ -633,6 +682,153 @@ class TextDuplicateDetector:
         
         return similar_groups
     
+    def _build_minhash(self, content: str) -> 'LeanMinHash':
+        """
+        计算文本的MinHash签名（基于字符5元组分片）
+        
+        Args:
+            content: 标准化后的文本
+            
+        Returns:
+            MinHash签名
+        """
+        shingles = {content[i:i + _SHINGLE_SIZE] 
+                    for i in range(max(len(content) - _SHINGLE_SIZE + 1, 1))}
+        minhash = MinHash(num_perm=_MINHASH_NUM_PERM)
+        minhash.update_batch([shingle.encode('utf-8') for shingle in shingles])
+        return LeanMinHash(minhash)
+    
+    def _lsh_similarity_groups(self, files: List[Dict[str, Any]], 
+                               progress_callback: Optional[Callable] = None) -> List[List[Dict[str, Any]]]:
+        """
+        MinHash-LSH预筛选 - 每个文件插入一次、查询一次即可得到候选对，
+        只对候选对做精确相似度计算，避免O(N²)的全量两两比较
+        
+        Args:
+            files: 过滤后的文件列表
+            progress_callback: 进度回调函数
+            
+        Returns:
+            相似文本组列表
+        """
+        # 每次检测新建索引，避免上次检测的文件残留在索引中
+        lsh = MinHashLSH(threshold=self.similarity_threshold / 100, num_perm=_MINHASH_NUM_PERM)
+        signatures = []
+        valid_files = []
+        
+        total = len(files)
+        for index, file_info in enumerate(files):
+            content = self._read_and_normalize_content(file_info)
+            if content:
+                signature = self._build_minhash(content)
+                lsh.insert(len(valid_files), signature)
+                signatures.append(signature)
+                valid_files.append(file_info)
+            
+            if progress_callback and (index + 1) % 100 == 0:
+                progress_callback(60 + int((index + 1) / total * 20), f"计算MinHash签名: {index + 1}/{total}")
+        
+        candidate_pairs = []
+        for index, signature in enumerate(signatures):
+            for other in lsh.query(signature):
+                if other > index:
+                    candidate_pairs.append((valid_files[index], valid_files[other]))
+        
+        if progress_callback:
+            progress_callback(80, f"LSH找到 {len(candidate_pairs)} 个候选对")
+        
+        if not candidate_pairs:
+            return []
+        return self._detailed_similarity_check(candidate_pairs, progress_callback)
+    
+    def _build_tfidf(self, files: List[Dict[str, Any]]):
+        """
+        将文件内容转换为TF-IDF稀疏矩阵（字符3-5元组，行向量已L2归一化）
+        
+        Args:
+            files: 文件列表
+            
+        Returns:
+            (成功读取内容的文件列表, CSR矩阵) 元组，文件不足两个时矩阵为None
+        """
+        documents = []
+        valid_files = []
+        for file_info in files:
+            content = self._read_and_normalize_content(file_info)
+            if content:
+                documents.append(content)
+                valid_files.append(file_info)
+        
+        if len(valid_files) < 2:
+            return valid_files, None
+        
+        vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(3, 5), dtype=np.float32)
+        return valid_files, vectorizer.fit_transform(documents).tocsr()
+    
+    def _tfidf_similarity_groups(self, files: List[Dict[str, Any]], 
+                                 progress_callback: Optional[Callable] = None) -> List[List[Dict[str, Any]]]:
+        """
+        向量化相似度检测 - 用稀疏矩阵乘法X @ X.T一次算出全部文件对的余弦相似度，
+        超过阈值的文件对作为边，按连通分量输出相似文件组
+        
+        Args:
+            files: 过滤后的文件列表
+            progress_callback: 进度回调函数
+            
+        Returns:
+            相似文本组列表
+        """
+        valid_files, matrix = self._build_tfidf(files)
+        if matrix is None:
+            return []
+        
+        count = len(valid_files)
+        threshold = self.similarity_threshold / 100
+        edge_rows, edge_cols, edge_sims = [], [], []
+        
+        # 按行分块相乘，避免一次生成完整的N×N相似度矩阵
+        for block_start in range(0, count, _TFIDF_BLOCK_ROWS):
+            block = (matrix[block_start:block_start + _TFIDF_BLOCK_ROWS] @ matrix.T).tocoo()
+            rows = block.row + block_start
+            mask = (block.data >= threshold) & (rows < block.col)
+            edge_rows.append(rows[mask])
+            edge_cols.append(block.col[mask])
+            edge_sims.append(block.data[mask])
+            
+            if progress_callback:
+                done = min(block_start + _TFIDF_BLOCK_ROWS, count)
+                progress_callback(60 + int(done / count * 35), f"相似度矩阵: {done}/{count}")
+        
+        rows = np.concatenate(edge_rows)
+        cols = np.concatenate(edge_cols)
+        sims = np.concatenate(edge_sims)
+        if not len(rows):
+            return []
+        
+        graph = coo_matrix((sims, (rows, cols)), shape=(count, count))
+        _, labels = connected_components(graph, directed=False)
+        
+        # 每个文件的相似度取其与组内其他文件的最大相似度
+        best = np.zeros(count, dtype=np.float32)
+        np.maximum.at(best, rows, sims)
+        np.maximum.at(best, cols, sims)
+        
+        components = defaultdict(list)
+        for index in np.unique(np.concatenate((rows, cols))):
+            components[labels[index]].append(index)
+        
+        similar_groups = []
+        for indices in components.values():
+            group = []
+            for index in indices:
+                file_copy = valid_files[index].copy()
+                file_copy['similarity'] = min(100.0, float(best[index]) * 100)
+                file_copy['match_type'] = 'similar'
+                group.append(file_copy)
+            similar_groups.append(group)
+        
+        return similar_groups
+    
     def _fast_pre_screening(self, files: List[Dict[str, Any]]) -> List[tuple]:
         """
         快速预筛选 - 基于轻量级特征快速排除明显不相似的文件对
@@ -652,10 +848,15 @@ class TextDuplicateDetector:
             if features:
                 files_with_features.append(features)
         
+        # 按大小排序后只比较大小相差20%以内的文件，超出范围即停止内层循环
+        files_with_features.sort(key=lambda x: x.get('size', 0))
+        
         # 快速比较轻量级特征
         for i in range(len(files_with_features)):
             for j in range(i + 1, len(files_with_features)):
                 file1, file2 = files_with_features[i], files_with_features[j]
+                if file1.get('size', 0) < file2.get('size', 0) * 0.8:
+                    break
                 
                 # 快速相似度检查
                 if self._quick_similarity_check(file1, file2):
@@ -772,7 +973,8 @@ class TextDuplicateDetector:
         Returns:
             相似文件组列表
         """
-        similarities = {}
+        # 文件信息字典不可哈希，以列表保存(文件对, 相似度)
+        similarities = []
         total_pairs = len(candidate_pairs)
         
         # 并行计算详细相似度
@@ -788,7 +990,7 @@ class TextDuplicateDetector:
                 try:
                     similarity = future.result()
                     if similarity >= self.similarity_threshold:
-                        similarities[pair] = similarity
+                        similarities.append((pair, similarity))
                     
                     completed += 1
                     if progress_callback and completed % 50 == 0:
@@ -799,7 +1001,7 @@ class TextDuplicateDetector:
         
         # 构建相似度图
         similarity_graph = defaultdict(list)
-        for (file1, file2), similarity in similarities.items():
+        for (file1, file2), similarity in similarities:
             similarity_graph[file1['path']].append((file2, similarity))
             similarity_graph[file2['path']].append((file1, similarity))
         
@@ -908,7 +1110,7 @@ class TextDuplicateDetector:
         """
         try:
             file_path = file_info.get('path', '')
-            encoding = file_info.get('encoding', 'utf-8')
+            encoding = self.scanner.ensure_encoding(file_info)
             
             # 对大文件只读取前面部分进行比较
             max_chars = 50000  # 最多读取50K字符
@@ -952,8 +1154,10 @@ class TextDuplicateDetector:
             if len1 > 1000 or len2 > 1000:
                 # 对长文本使用采样比较
                 similarity = self._sample_based_similarity(text1, text2)
-            else:
+            elif rf_fuzz is not None:
                 # 对短文本使用完整比较
+                similarity = rf_fuzz.ratio(text1, text2)
+            else:
                 similarity = SequenceMatcher(None, text1, text2).ratio() * 100
             
             return max(0.0, min(100.0, similarity))
@@ -980,6 +1184,15 @@ class TextDuplicateDetector:
         # 从开头、中间、结尾各取几段进行比较
         positions = [0, len(text1)//4, len(text1)//2, 3*len(text1)//4, max(0, len(text1)-chunk_size)]
         
+        if rf_fuzz is not None:
+            # 开头、中间、结尾的段落与text2的全部段落一次算出相似度矩阵，每行取最大值
+            chunks1 = [text1[pos:pos+chunk_size] for pos in positions if pos < len(text1)]
+            chunks2 = [text2[pos2:pos2+chunk_size] for pos2 in range(0, len(text2), chunk_size//2)]
+            if not chunks1 or not chunks2:
+                return 0.0
+            scores = rf_process.cdist(chunks1, chunks2, scorer=rf_fuzz.ratio)
+            return float(scores.max(axis=1).mean())
+        
         for pos in positions:
             if pos >= len(text1):
                 continue
@@ -1004,73 +1217,97 @@ class TextDuplicateDetector:
         
         return 0.0
     
-    def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
+    def _preprocess_text(self, file_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
-        计算余弦相似度
+        预处理文本内容，提取详细相似度分析所需的词哈希序列和结构特征
         
         Args:
-            vec1: 向量1
-            vec2: 向量2
+            file_info: 文件信息
             
         Returns:
-            余弦相似度
+            附加了normalized_content、tokens、vocabulary和features的文件信息副本，读取失败返回None
         """
-        try:
-            if len(vec1) != len(vec2):
-                return 0.0
-            
-            dot_product = sum(a * b for a, b in zip(vec1, vec2))
-            magnitude1 = sum(a * a for a in vec1) ** 0.5
-            magnitude2 = sum(b * b for b in vec2) ** 0.5
-            
-            if magnitude1 == 0 or magnitude2 == 0:
-                return 0.0
-            
-            return dot_product / (magnitude1 * magnitude2)
+        # 内容相同的文件分析结果相同，按内容哈希缓存，每个内容只分词一次
+        content_hash = file_info.get('content_hash')
+        analysis = self._feature_cache.get(content_hash) if content_hash else None
+        if analysis is None:
+            analysis = self._analyze_content(file_info)
+            if analysis is None:
+                return None
+            if content_hash:
+                self._feature_cache[content_hash] = analysis
+        
+        processed_info = file_info.copy()
+        processed_info.update(analysis)
+        return processed_info
+    
+    def _analyze_content(self, file_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        读取文件内容并提取词哈希序列和结构特征
+        
+        Args:
+            file_info: 文件信息
             
-        except Exception:
-            return 0.0
+        Returns:
+            分析结果字典，读取失败返回None
+        """
+        content = self._read_and_normalize_content(file_info)
+        if not content:
+            return None
+        
+        tokens = _tokenize(content)
+        sentences = [s for s in _SENTENCE_RE.split(content) if s.strip()]
+        
+        return {
+            'normalized_content': content,
+            'tokens': tokens,
+            'vocabulary': np.unique(tokens),
+            'features': {
+                'sentence_count': len(sentences),
+                'avg_sentence_length': len(content) / max(len(sentences), 1),
+                'word_count': len(tokens),
+                'char_count': len(content)
+            }
+        }
     
     def get_similarity_details(self, file1: Dict[str, Any], file2: Dict[str, Any]) -> Dict[str, float]:
         """
         获取详细的相似度分析结果
         
         Args:
-            file1: 文件1信息
-            file2: 文件2信息
+            file1: 经_preprocess_text处理的文件1信息
+            file2: 经_preprocess_text处理的文件2信息
             
         Returns:
             详细相似度分析结果
         """
-        content1 = file1.get('normalized_content', '')
-        content2 = file2.get('normalized_content', '')
+        empty = np.zeros(0, dtype=np.uint32)
+        tokens1 = file1.get('tokens', empty)
+        tokens2 = file2.get('tokens', empty)
         features1 = file1.get('features', {})
         features2 = file2.get('features', {})
         
         details = {}
         
         # 序列相似度
-        details['sequence_similarity'] = SequenceMatcher(None, content1, content2).ratio() * 100
+        details['sequence_similarity'] = _sequence_sim(
+            tokens1[:_SEQUENCE_MAX_TOKENS], tokens2[:_SEQUENCE_MAX_TOKENS]) * 100
         
         # 词汇相似度
-        words1 = set(features1.get('word_freq', {}).keys())
-        words2 = set(features2.get('word_freq', {}).keys())
-        if words1 or words2:
-            details['vocabulary_similarity'] = len(words1 & words2) / len(words1 | words2) * 100
-        else:
-            details['vocabulary_similarity'] = 0.0
+        details['vocabulary_similarity'] = _vocab_sim(
+            file1.get('vocabulary', empty), file2.get('vocabulary', empty)) * 100
         
         # 结构相似度
-        struct_features1 = [
+        struct_features1 = np.array([
             features1.get('sentence_count', 0),
             features1.get('avg_sentence_length', 0),
             features1.get('word_count', 0) / max(features1.get('char_count', 1), 1)
-        ]
-        struct_features2 = [
+        ], dtype=np.float64)
+        struct_features2 = np.array([
             features2.get('sentence_count', 0),
             features2.get('avg_sentence_length', 0),
             features2.get('word_count', 0) / max(features2.get('char_count', 1), 1)
-        ]
-        details['structure_similarity'] = self._cosine_similarity(struct_features1, struct_features2) * 100
+        ], dtype=np.float64)
+        details['structure_similarity'] = _struct_sim(struct_features1, struct_features2) * 100
         
-        return details
\ No newline at end of file
+        return details
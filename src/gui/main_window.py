@@ -40,6 +40,7 @@ class ScanWorker(QThread):
         self.paths = paths
         self.similarity_threshold = similarity_threshold
         self.scan_mode = scan_mode  # 'video' or 'text' or 'image'
+        self.file_processor = FileProcessor()
         self.is_cancelled = False
         self.start_time = None
         self.stats = {
@@ -99,10 +100,8 @@ class ScanWorker(QThread):
             files = scanner.scan_directory(path, progress_callback=progress_callback_with_stats)
             video_files.extend(files)
             
-            # 实时计算总大小
-            for file_info in files:
-                if 'size' in file_info:
-                    total_size += file_info['size']
+            # 实时计算总大小（直接累加扫描结果中的大小，不再重复stat）
+            total_size += self.file_processor.get_total_size(files)
         
         if not video_files:
             self.error_occurred.emit("未找到任何视频文件")
@@ -157,10 +156,8 @@ class ScanWorker(QThread):
             files = scanner.scan_directory(path, progress_callback=progress_callback_with_stats)
             text_files.extend(files)
             
-            # 实时计算总大小
-            for file_info in files:
-                if 'size' in file_info:
-                    total_size += file_info['size']
+            # 实时计算总大小（直接累加扫描结果中的大小，不再重复stat）
+            total_size += self.file_processor.get_total_size(files)
         
         if not text_files:
             self.error_occurred.emit("未找到任何文本文件")
@@ -224,10 +221,8 @@ class ScanWorker(QThread):
             files = scanner.scan_directory(path, progress_callback=progress_callback_with_stats)
             image_files.extend(files)
             
-            # 实时计算总大小
-            for file_info in files:
-                if 'size' in file_info:
-                    total_size += file_info['size']
+            # 实时计算总大小（直接累加扫描结果中的大小，不再重复stat）
+            total_size += self.file_processor.get_total_size(files)
         
         if not image_files:
             self.error_occurred.emit("未找到任何图片文件")
@@ -458,8 +453,7 @@ class MainWindow(QMainWindow):
     def add_path(self):
         """添加扫描路径"""
         path = QFileDialog.getExistingDirectory(self, "选择要扫描的目录")
-        if path and path not in [self.path_list.item(i).text() 
-                                for i in range(self.path_list.count())]:
+        if path and not self.path_list.findItems(path, Qt.MatchExactly):
             self.path_list.addItem(path)
             
     def remove_selected_path(self):
@@ -9,9 +9,55 @@ from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTabWidget,
                              QWidget, QLabel, QSpinBox, QSlider, QComboBox,
                              QLineEdit, QPushButton, QCheckBox, QGroupBox,
                              QFileDialog, QMessageBox, QFormLayout)
-from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtCore import (Qt, pyqtSignal, QObject, QRunnable, QThreadPool,
+                          QMutex, QMutexLocker)
 from utils.config import config
 
+# 主题配置值与界面显示文本的映射
+_THEME_FWD = {'default': '默认', 'dark': '深色', 'light': '浅色'}
+_THEME_REV = {v: k for k, v in _THEME_FWD.items()}
+
+class ConfigSaveSignals(QObject):
+    """配置保存任务信号"""
+    finished = pyqtSignal()
+
+class ConfigSaveTask(QRunnable):
+    """后台保存配置任务，避免磁盘写入阻塞界面线程"""
+    
+    _signals = None  # 各任务共用的信号对象，在界面线程中首次使用时创建
+    _mutex = QMutex()
+    _saving = 0  # 尚未完成的保存任务数
+    
+    @classmethod
+    def signals(cls) -> ConfigSaveSignals:
+        """获取保存任务的信号对象（须在界面线程中调用）"""
+        if cls._signals is None:
+            cls._signals = ConfigSaveSignals()
+        return cls._signals
+    
+    @classmethod
+    def is_saving(cls):
+        """是否有正在进行的保存任务"""
+        with QMutexLocker(cls._mutex):
+            return cls._saving > 0
+    
+    @classmethod
+    def submit(cls):
+        """提交保存任务到全局线程池"""
+        cls.signals()
+        with QMutexLocker(cls._mutex):
+            cls._saving += 1
+        QThreadPool.globalInstance().start(cls())
+    
+    def run(self):
+        """保存配置文件"""
+        try:
+            config.save_config()
+        finally:
+            with QMutexLocker(ConfigSaveTask._mutex):
+                ConfigSaveTask._saving -= 1
+            ConfigSaveTask._signals.finished.emit()
+
 class SettingsDialog(QDialog):
     """设置对话框"""
     
@@ -22,6 +68,19 @@ class SettingsDialog(QDialog):
         self.init_ui()
         self.load_settings()
         
+        # 上一次的设置仍在后台保存时显示提示
+        if ConfigSaveTask.is_saving():
+            self.saving_label.show()
+        ConfigSaveTask.signals().finished.connect(self.on_save_finished)
+        
+    def done(self, result):
+        """关闭对话框（确定、取消或关闭窗口）时断开保存信号，已关闭的对话框不再接收通知"""
+        try:
+            ConfigSaveTask.signals().finished.disconnect(self.on_save_finished)
+        except TypeError:
+            pass  # 已经断开
+        super().done(result)
+        
     def init_ui(self):
         """初始化用户界面"""
         self.setWindowTitle("设置")
@@ -31,17 +90,17 @@ class SettingsDialog(QDialog):
         layout = QVBoxLayout(self)
         
         # 创建选项卡
-        tab_widget = QTabWidget()
-        layout.addWidget(tab_widget)
+        self.tab_widget = QTabWidget()
+        layout.addWidget(self.tab_widget)
         
         # 检测设置选项卡
-        self.create_detection_tab(tab_widget)
-        
-        # 文件处理选项卡
-        self.create_processing_tab(tab_widget)
+        self.tab_widget.addTab(self.create_detection_tab(), "检测设置")
         
-        # 界面设置选项卡
-        self.create_ui_tab(tab_widget)
+        # 其余选项卡先使用占位控件，首次切换时再创建
+        self.tab_widget.addTab(QWidget(), "文件处理")
+        self.tab_widget.addTab(QWidget(), "界面设置")
+        self._tabs_built = {0: True}
+        self.tab_widget.currentChanged.connect(self.on_tab_changed)
         
         # 按钮布局
         button_layout = QHBoxLayout()
@@ -51,6 +110,11 @@ class SettingsDialog(QDialog):
         reset_btn.clicked.connect(self.reset_to_default)
         button_layout.addWidget(reset_btn)
         
+        # 后台保存提示
+        self.saving_label = QLabel("保存中…")
+        self.saving_label.hide()
+        button_layout.addWidget(self.saving_label)
+        
         button_layout.addStretch()
         
         # 确定和取消按钮
@@ -64,7 +128,7 @@ class SettingsDialog(QDialog):
         
         layout.addLayout(button_layout)
         
-    def create_detection_tab(self, tab_widget):
+    def create_detection_tab(self):
         """创建检测设置选项卡"""
         tab = QWidget()
         layout = QVBoxLayout(tab)
@@ -113,9 +177,9 @@ class SettingsDialog(QDialog):
         layout.addWidget(filter_group)
         
         layout.addStretch()
-        tab_widget.addTab(tab, "检测设置")
+        return tab
         
-    def create_processing_tab(self, tab_widget):
+    def create_processing_tab(self):
         """创建文件处理选项卡"""
         tab = QWidget()
         layout = QVBoxLayout(tab)
@@ -159,9 +223,9 @@ class SettingsDialog(QDialog):
         layout.addWidget(safety_group)
         
         layout.addStretch()
-        tab_widget.addTab(tab, "文件处理")
+        return tab
         
-    def create_ui_tab(self, tab_widget):
+    def create_ui_tab(self):
         """创建界面设置选项卡"""
         tab = QWidget()
         layout = QVBoxLayout(tab)
@@ -197,7 +261,34 @@ class SettingsDialog(QDialog):
         layout.addWidget(display_group)
         
         layout.addStretch()
-        tab_widget.addTab(tab, "界面设置")
+        return tab
+        
+    def on_tab_changed(self, index):
+        """选项卡切换时按需创建尚未构建的选项卡"""
+        if self._tabs_built.get(index):
+            return
+        
+        builders = {
+            1: (self.create_processing_tab, self._load_processing_settings),
+            2: (self.create_ui_tab, self._load_ui_settings),
+        }
+        if index not in builders:
+            return
+        create_tab, load_tab_settings = builders[index]
+        
+        # 用真实选项卡替换占位控件
+        title = self.tab_widget.tabText(index)
+        placeholder = self.tab_widget.widget(index)
+        tab = create_tab()
+        self.tab_widget.blockSignals(True)
+        self.tab_widget.removeTab(index)
+        self.tab_widget.insertTab(index, tab, title)
+        self.tab_widget.setCurrentIndex(index)
+        self.tab_widget.blockSignals(False)
+        placeholder.deleteLater()
+        self._tabs_built[index] = True
+        
+        load_tab_settings(config.view())
         
     def update_similarity_label(self, value):
         """更新相似度标签"""
@@ -218,33 +309,44 @@ class SettingsDialog(QDialog):
             self.backup_folder_edit.setText(folder)
             
     def load_settings(self):
-        """加载设置"""
-        # 检测设置
-        self.similarity_threshold_slider.setValue(config.get('similarity_threshold', 80))
-        self.sample_frames_spin.setValue(config.get('sample_frames', 10))
-        self.min_size_spin.setValue(config.get('min_file_size', 1024*1024) // (1024*1024))
-        self.min_duration_spin.setValue(config.get('min_duration', 5))
-        
-        # 文件处理设置
-        processing_mode = config.get('processing_mode', 'trash')
+        """加载设置（仅填充已构建的选项卡）"""
+        # 使用只读视图读取配置，避免逐项调用config.get或复制整个配置
+        settings = config.view()
+        
+        self._load_detection_settings(settings)
+        if self._tabs_built.get(1):
+            self._load_processing_settings(settings)
+        if self._tabs_built.get(2):
+            self._load_ui_settings(settings)
+        
+    def _load_detection_settings(self, settings):
+        """加载检测设置"""
+        self.similarity_threshold_slider.setValue(settings.get('similarity_threshold', 80))
+        self.sample_frames_spin.setValue(settings.get('sample_frames', 10))
+        self.min_size_spin.setValue(settings.get('min_file_size', 1024*1024) // (1024*1024))
+        self.min_duration_spin.setValue(settings.get('min_duration', 5))
+        
+    def _load_processing_settings(self, settings):
+        """加载文件处理设置"""
+        processing_mode = settings.get('processing_mode', 'trash')
         for i in range(self.processing_mode_combo.count()):
             if self.processing_mode_combo.itemData(i) == processing_mode:
                 self.processing_mode_combo.setCurrentIndex(i)
                 break
                 
-        self.backup_folder_edit.setText(config.get('backup_folder', ''))
+        self.backup_folder_edit.setText(settings.get('backup_folder', ''))
         # 使用当前索引而不是处理模式字符串
         self.on_processing_mode_changed(self.processing_mode_combo.currentIndex())
         
-        # 界面设置
-        theme = config.get('ui_theme', 'default')
-        theme_map = {'default': '默认', 'dark': '深色', 'light': '浅色'}
-        theme_text = theme_map.get(theme, '默认')
+    def _load_ui_settings(self, settings):
+        """加载界面设置"""
+        theme = settings.get('ui_theme', 'default')
+        theme_text = _THEME_FWD.get(theme, '默认')
         index = self.theme_combo.findText(theme_text)
         if index >= 0:
             self.theme_combo.setCurrentIndex(index)
             
-        language = config.get('language', 'zh_CN')
+        language = settings.get('language', 'zh_CN')
         for i in range(self.language_combo.count()):
             if self.language_combo.itemData(i) == language:
                 self.language_combo.setCurrentIndex(i)
@@ -253,31 +355,34 @@ class SettingsDialog(QDialog):
     def accept_settings(self):
         """接受设置"""
         try:
-            # 保存检测设置
-            config.set('similarity_threshold', self.similarity_threshold_slider.value())
-            config.set('sample_frames', self.sample_frames_spin.value())
-            config.set('min_file_size', self.min_size_spin.value() * 1024 * 1024)
-            config.set('min_duration', self.min_duration_spin.value())
-            
-            # 保存文件处理设置
-            processing_mode = self.processing_mode_combo.currentData()
-            if processing_mode is None:
-                processing_mode = 'trash'
-            config.set('processing_mode', processing_mode)
-            config.set('backup_folder', self.backup_folder_edit.text())
-            
-            # 保存界面设置
-            theme_map = {'默认': 'default', '深色': 'dark', '浅色': 'light'}
-            theme = theme_map.get(self.theme_combo.currentText(), 'default')
-            config.set('ui_theme', theme)
-            
-            language = self.language_combo.currentData()
-            if language is None:
-                language = 'zh_CN'
-            config.set('language', language)
-            
-            # 保存配置到文件
-            config.save_config()
+            # 批量修改期间只更新内存中的配置，退出时如有变化在后台线程保存一次
+            with config.batch(flush=ConfigSaveTask.submit):
+                # 检测设置
+                config.update({
+                    'similarity_threshold': self.similarity_threshold_slider.value(),
+                    'sample_frames': self.sample_frames_spin.value(),
+                    'min_file_size': self.min_size_spin.value() * 1024 * 1024,
+                    'min_duration': self.min_duration_spin.value()
+                })
+                
+                # 文件处理设置（未打开过的选项卡保持原有配置）
+                if self._tabs_built.get(1):
+                    processing_mode = self.processing_mode_combo.currentData()
+                    if processing_mode is None:
+                        processing_mode = 'trash'
+                    config.update({
+                        'processing_mode': processing_mode,
+                        'backup_folder': self.backup_folder_edit.text()
+                    })
+                
+                # 界面设置
+                if self._tabs_built.get(2):
+                    theme = _THEME_REV.get(self.theme_combo.currentText(), 'default')
+                    
+                    language = self.language_combo.currentData()
+                    if language is None:
+                        language = 'zh_CN'
+                    config.update({'ui_theme': theme, 'language': language})
             
             # 发出设置改变信号
             self.settings_changed.emit()
@@ -287,6 +392,11 @@ class SettingsDialog(QDialog):
         except Exception as e:
             QMessageBox.critical(self, "错误", f"保存设置失败: {str(e)}")
             
+    def on_save_finished(self):
+        """后台保存完成"""
+        if not ConfigSaveTask.is_saving():
+            self.saving_label.hide()
+            
     def reset_to_default(self):
         """重置为默认设置"""
         reply = QMessageBox.question(self, "确认重置", 
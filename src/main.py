@@ -7,6 +7,7 @@ Video Duplicate Finder - Main Entry Point
 
 import sys
 import os
+import multiprocessing
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtCore import Qt
 from gui.main_window import MainWindow
@@ -30,4 +31,6 @@ def main():
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
+    # 打包后的程序中，扫描器的进程池子进程需要由freeze_support接管
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -6,11 +6,32 @@ File Processor
 """
 
 import os
+import sys
+import errno
+import ctypes
 import shutil
+import logging
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Callable, Union, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import send2trash
 
+logger = logging.getLogger(__name__)
+
+# renameat2的参数：相对当前工作目录解析路径，目标已存在时失败而不是覆盖
+_AT_FDCWD = -100
+_RENAME_NOREPLACE = 1
+
+_renameat2 = None
+if sys.platform.startswith('linux'):
+    try:
+        # Linux（glibc 2.28+）上可原子地"不覆盖重命名"
+        _renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+        _renameat2.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint)
+        _renameat2.restype = ctypes.c_int
+    except (OSError, AttributeError):
+        _renameat2 = None
+
 class FileProcessor:
     """文件处理器"""
     
@@ -22,6 +43,8 @@ class FileProcessor:
             backup_folder: 备份文件夹路径（可选）
         """
         self.backup_folder = backup_folder
+        # 无法使用重命名快速路径（跨文件系统等）的备份文件夹
+        self._slow_move_folders = set()
         
     def move_to_trash(self, file_paths: List[str]) -> int:
         """
@@ -33,20 +56,18 @@ class FileProcessor:
         Returns:
             成功处理的文件数量
         """
-        success_count = 0
-        
-        for file_path in file_paths:
+        def trash_file(file_path: str) -> bool:
             try:
-                if os.path.exists(file_path):
-                    send2trash.send2trash(file_path)
-                    success_count += 1
-                    print(f"已移动到回收站: {file_path}")
-                else:
-                    print(f"文件不存在: {file_path}")
+                send2trash.send2trash(file_path)
+                logger.debug("已移动到回收站: %s", file_path)
+                return True
+            except FileNotFoundError:
+                logger.warning("文件不存在: %s", file_path)
             except Exception as e:
-                print(f"移动文件到回收站失败 {file_path}: {e}")
+                logger.error("移动文件到回收站失败 %s: %s", file_path, e)
+            return False
                 
-        return success_count
+        return self._parallel_apply(trash_file, file_paths)
         
     def move_to_backup(self, file_paths: List[str], backup_folder: Optional[str] = None) -> int:
         """
@@ -68,35 +89,139 @@ class FileProcessor:
         backup_path = Path(target_folder)
         backup_path.mkdir(parents=True, exist_ok=True)
         
-        success_count = 0
+        backup_dir = str(backup_path)
         
-        for file_path in file_paths:
+        def backup_file(file_path: str) -> bool:
             try:
-                if os.path.exists(file_path):
-                    source_path = Path(file_path)
-                    
-                    # 生成目标路径，保持原始文件名
-                    target_path = backup_path / source_path.name
-                    
-                    # 如果目标文件已存在，添加序号
-                    counter = 1
-                    original_target = target_path
-                    while target_path.exists():
-                        stem = original_target.stem
-                        suffix = original_target.suffix
-                        target_path = backup_path / f"{stem}_{counter}{suffix}"
-                        counter += 1
-                    
-                    # 移动文件
-                    shutil.move(str(source_path), str(target_path))
-                    success_count += 1
-                    print(f"已移动到备份文件夹: {file_path} -> {target_path}")
-                else:
-                    print(f"文件不存在: {file_path}")
+                # 移动文件，保持原始文件名
+                target_path = self._move_file(file_path, backup_dir)
+                logger.debug("已移动到备份文件夹: %s -> %s", file_path, target_path)
+                return True
+            except FileNotFoundError:
+                logger.warning("文件不存在: %s", file_path)
             except Exception as e:
-                print(f"移动文件到备份文件夹失败 {file_path}: {e}")
+                logger.error("移动文件到备份文件夹失败 %s: %s", file_path, e)
+            return False
                 
-        return success_count
+        return self._parallel_apply(backup_file, file_paths)
+        
+    def _move_file(self, file_path: str, backup_dir: str) -> str:
+        """
+        移动单个文件到备份文件夹，目标文件已存在时添加序号
+        
+        同一文件系统内直接重命名，由FileExistsError判断重名，
+        省去每次尝试前的存在性检查；跨文件系统时回退到shutil.move
+        
+        Args:
+            file_path: 源文件路径
+            backup_dir: 备份文件夹路径
+            
+        Returns:
+            实际的目标文件路径
+        """
+        name = os.path.basename(file_path)
+        
+        if backup_dir not in self._slow_move_folders:
+            # 重名时的文件名前后缀只拆分一次，循环内仅做字符串拼接
+            stem, suffix = os.path.splitext(name)
+            target_path = f"{backup_dir}{os.sep}{name}"
+            counter = 1
+            while True:
+                try:
+                    self._rename_no_replace(file_path, target_path)
+                    return target_path
+                except FileExistsError:
+                    # 如果目标文件已存在，添加序号
+                    target_path = f"{backup_dir}{os.sep}{stem}_{counter}{suffix}"
+                    counter += 1
+                except FileNotFoundError:
+                    raise
+                except OSError:
+                    # 跨文件系统或不支持硬链接，之后直接使用shutil.move
+                    self._slow_move_folders.add(backup_dir)
+                    break
+        
+        # 占用不重名的目标文件名后再移动，避免并行移动时相互覆盖
+        target_path = self._reserve_target(backup_dir, name)
+        try:
+            shutil.move(file_path, target_path)
+        except Exception:
+            self._release_target(target_path)
+            raise
+        return target_path
+        
+    @staticmethod
+    def _reserve_target(folder: str, name: str) -> str:
+        """
+        在目标文件夹中以独占方式创建占位文件，目标文件已存在时添加序号
+        
+        Args:
+            folder: 目标文件夹路径
+            name: 原始文件名
+            
+        Returns:
+            已占用的目标文件路径
+        """
+        target_path = f"{folder}{os.sep}{name}"
+        stem, suffix = os.path.splitext(name)
+        counter = 1
+        while True:
+            try:
+                with open(target_path, 'xb'):
+                    return target_path
+            except FileExistsError:
+                target_path = f"{folder}{os.sep}{stem}_{counter}{suffix}"
+                counter += 1
+                
+    @staticmethod
+    def _release_target(target_path: str):
+        """
+        删除操作失败后残留的占位文件或不完整的目标文件
+        
+        Args:
+            target_path: 目标文件路径
+        """
+        try:
+            os.remove(target_path)
+        except OSError:
+            pass
+        
+    @staticmethod
+    def _rename_no_replace(source: str, target: str):
+        """
+        重命名文件，目标已存在时抛出FileExistsError而不是覆盖
+        
+        Linux上优先使用renameat2(RENAME_NOREPLACE)原子完成，其他POSIX系统使用硬链接+删除源文件
+        
+        Args:
+            source: 源文件路径
+            target: 目标文件路径
+        """
+        if os.name == 'nt':
+            # Windows上os.rename不会覆盖已存在的目标
+            os.rename(source, target)
+            return
+        
+        if _renameat2 is not None:
+            if _renameat2(_AT_FDCWD, os.fsencode(source), _AT_FDCWD, os.fsencode(target),
+                          _RENAME_NOREPLACE) == 0:
+                return
+            err = ctypes.get_errno()
+            # 文件系统或内核不支持该标志时回退到硬链接方式，其余错误（含EEXIST）直接抛出
+            if err not in (errno.EINVAL, errno.ENOSYS):
+                raise OSError(err, os.strerror(err), source, None, target)
+        
+        # POSIX上os.rename会静默覆盖目标，改用硬链接+删除源文件
+        os.link(source, target, follow_symlinks=False)
+        try:
+            os.unlink(source)
+        except OSError:
+            # 源文件删除失败时撤销硬链接，避免目标文件夹中残留多出的链接
+            try:
+                os.unlink(target)
+            except OSError:
+                pass
+            raise
         
     def delete_permanently(self, file_paths: List[str]) -> int:
         """
@@ -108,20 +233,18 @@ class FileProcessor:
         Returns:
             成功处理的文件数量
         """
-        success_count = 0
-        
-        for file_path in file_paths:
+        def delete_file(file_path: str) -> bool:
             try:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                    success_count += 1
-                    print(f"已永久删除: {file_path}")
-                else:
-                    print(f"文件不存在: {file_path}")
+                os.remove(file_path)
+                logger.debug("已永久删除: %s", file_path)
+                return True
+            except FileNotFoundError:
+                logger.warning("文件不存在: %s", file_path)
             except Exception as e:
-                print(f"删除文件失败 {file_path}: {e}")
+                logger.error("删除文件失败 %s: %s", file_path, e)
+            return False
                 
-        return success_count
+        return self._parallel_apply(delete_file, file_paths)
         
     def copy_to_folder(self, file_paths: List[str], target_folder: str) -> int:
         """
@@ -138,54 +261,90 @@ class FileProcessor:
         target_path = Path(target_folder)
         target_path.mkdir(parents=True, exist_ok=True)
         
-        success_count = 0
+        target_dir = str(target_path)
         
-        for file_path in file_paths:
+        def copy_file(file_path: str) -> bool:
             try:
-                if os.path.exists(file_path):
-                    source_path = Path(file_path)
-                    
-                    # 生成目标路径
-                    dest_path = target_path / source_path.name
-                    
-                    # 如果目标文件已存在，添加序号
-                    counter = 1
-                    original_dest = dest_path
-                    while dest_path.exists():
-                        stem = original_dest.stem
-                        suffix = original_dest.suffix
-                        dest_path = target_path / f"{stem}_{counter}{suffix}"
-                        counter += 1
-                    
-                    # 复制文件
-                    shutil.copy2(str(source_path), str(dest_path))
-                    success_count += 1
-                    print(f"已复制: {file_path} -> {dest_path}")
-                else:
-                    print(f"文件不存在: {file_path}")
+                # 生成目标路径，如果目标文件已存在，添加序号
+                dest_path = self._reserve_target(target_dir, os.path.basename(file_path))
+                
+                # 复制文件
+                try:
+                    shutil.copy2(file_path, dest_path)
+                except Exception:
+                    self._release_target(dest_path)
+                    raise
+                logger.debug("已复制: %s -> %s", file_path, dest_path)
+                return True
+            except FileNotFoundError:
+                logger.warning("文件不存在: %s", file_path)
             except Exception as e:
-                print(f"复制文件失败 {file_path}: {e}")
+                logger.error("复制文件失败 %s: %s", file_path, e)
+            return False
                 
+        return self._parallel_apply(copy_file, file_paths)
+        
+    def _parallel_apply(self, fn: Callable[[str], bool], file_paths: List[str],
+                        max_workers: Optional[int] = None) -> int:
+        """
+        使用线程池并行处理文件（文件操作以I/O为主，系统调用期间会释放GIL）
+        
+        Args:
+            fn: 处理单个文件的函数，成功时返回True
+            file_paths: 文件路径列表
+            max_workers: 最大工作线程数，默认根据文件数量确定
+            
+        Returns:
+            成功处理的文件数量
+        """
+        if not file_paths:
+            return 0
+        
+        if max_workers is None:
+            max_workers = min(16, max(4, len(file_paths) // 4))
+        
+        success_count = 0
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_path = {
+                executor.submit(fn, file_path): file_path
+                for file_path in file_paths
+            }
+            
+            for future in as_completed(future_to_path):
+                try:
+                    if future.result():
+                        success_count += 1
+                except Exception as e:
+                    logger.error("处理文件失败 %s: %s", future_to_path[future], e)
+                    
         return success_count
         
-    def get_total_size(self, file_paths: List[str]) -> int:
+    def get_total_size(self, files: List[Union[str, Dict[str, Any]]]) -> int:
         """
         计算文件总大小
         
+        扫描得到的文件信息已含'size'，直接累加，不再重复stat
+        
         Args:
-            file_paths: 文件路径列表
+            files: 文件路径列表，或扫描器返回的文件信息列表
             
         Returns:
             总大小（字节）
         """
         total_size = 0
         
-        for file_path in file_paths:
+        for item in files:
+            if isinstance(item, dict):
+                total_size += item.get('size', 0)
+                continue
+            
             try:
-                if os.path.exists(file_path):
-                    total_size += os.path.getsize(file_path)
+                total_size += os.path.getsize(item)
+            except FileNotFoundError:
+                pass
             except Exception as e:
-                print(f"获取文件大小失败 {file_path}: {e}")
+                logger.error("获取文件大小失败 %s: %s", item, e)
                 
         return total_size
         
@@ -219,9 +378,11 @@ class FileProcessor:
         missing_files = []
         
         for file_path in file_paths:
-            if os.path.exists(file_path):
+            try:
+                os.stat(file_path)
                 existing_files.append(file_path)
-            else:
+            except (OSError, ValueError):
+                # 与os.path.exists一致，无法访问的路径视为不存在
                 missing_files.append(file_path)
                 
         return existing_files, missing_files
\ No newline at end of file
@@ -6,22 +6,28 @@ Image File Scanner
 """
 
 import os
+import time
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Callable
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
-from PIL import Image
-import cv2
-import numpy as np
+from typing import List, Dict, Any, Optional, Callable, Iterator, Iterable, Tuple
+
+# 扫描时跳过的常见非图片目录
+_SKIP_DIRS = frozenset({
+    '__pycache__', 'node_modules', '.git', '.svn',
+    'build', 'dist', 'target', 'bin', 'obj'
+})
+
+# 遍历时文件总数未知，进度按已处理数渐近增长：处理该数量的文件时进度走完10%~95%区间的一半
+_PROGRESS_HALF_COUNT = 500
 
 class ImageScanner:
     """图片文件扫描器"""
     
     # 支持的图片文件扩展名
-    SUPPORTED_EXTENSIONS = {
+    SUPPORTED_EXTENSIONS = frozenset({
         '.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff', '.tif',
         '.webp', '.svg', '.heic', '.heif', '.jp2', '.j2k', '.dng'
-    }
+    })
+    _SUPPORTED_SUFFIXES_TUPLE = tuple(SUPPORTED_EXTENSIONS)
     
     def __init__(self, max_file_size: int = 50 * 1024 * 1024):  # 50MB
         """
@@ -31,7 +37,6 @@ class ImageScanner:
             max_file_size: 最大文件大小限制（字节）
         """
         self.max_file_size = max_file_size
-        self._lock = threading.Lock()
         
     def scan_directory(self, directory_path: str, 
                       progress_callback: Optional[Callable] = None) -> List[Dict[str, Any]]:
@@ -52,41 +57,49 @@ class ImageScanner:
                 progress_callback(0, "路径不存在")
             return image_files
         
-        # 首先快速统计文件总数用于进度计算
-        total_files = 0
-        processed_files = 0
-        
         if progress_callback:
-            progress_callback(5, "正在统计文件数量...")
-            for root, dirs, files in os.walk(directory_path):
-                dirs[:] = [d for d in dirs if not d.startswith('.') and 
-                          d.lower() not in {'__pycache__', 'node_modules', '.git', '.svn', 
-                                           'build', 'dist', 'target', 'bin', 'obj'}]
-                for file in files:
-                    if self._is_image_file(file):
-                        total_files += 1
-            
-        # 遍历目录收集图片文件
-        image_paths = []
-        for root, dirs, files in os.walk(directory_path):
-            # 跳过隐藏目录和常见的非图片目录
-            dirs[:] = [d for d in dirs if not d.startswith('.') and 
-                      d.lower() not in {'__pycache__', 'node_modules', '.git', '.svn', 
-                                       'build', 'dist', 'target', 'bin', 'obj'}]
-            
-            for file in files:
-                if self._is_image_file(file):
-                    file_path = os.path.join(root, file)
-                    image_paths.append(file_path)
+            progress_callback(5, "正在扫描图片文件...")
         
-        # 并行处理图片文件信息
-        image_files = self._parallel_get_image_info(image_paths, total_files, progress_callback)
+        # 边遍历目录边处理图片文件信息
+        image_files = self._collect_image_info(self._iter_scandir(directory_path), 
+                                               progress_callback)
         
         if progress_callback:
             progress_callback(95, f"扫描完成，找到 {len(image_files)} 个图片文件")
         
         return image_files
     
+    def _iter_scandir(self, path: str) -> Iterator[Tuple[str, os.stat_result]]:
+        """
+        递归遍历目录，产出图片文件路径及其stat结果
+        
+        使用os.scandir复用DirEntry的stat结果，避免对每个文件重复调用
+        os.path.getsize/os.path.getmtime
+        
+        Args:
+            path: 目录路径
+            
+        Yields:
+            (文件路径, stat结果) 元组
+        """
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError:
+            return
+        
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    # 跳过隐藏目录和常见的非图片目录
+                    name = entry.name
+                    if not name.startswith('.') and name.lower() not in _SKIP_DIRS:
+                        yield from self._iter_scandir(entry.path)
+                elif entry.is_file() and self._is_image_file(entry.name):
+                    yield entry.path, entry.stat()
+            except OSError:
+                continue
+    
     def _is_image_file(self, filename: str) -> bool:
         """
         判断是否为支持的图片文件
@@ -97,17 +110,19 @@ class ImageScanner:
         Returns:
             是否为图片文件
         """
-        _, ext = os.path.splitext(filename.lower())
-        return ext in self.SUPPORTED_EXTENSIONS
+        # 只对文件名末尾做小写转换，扩展名最长为5个字符
+        return filename[-6:].lower().endswith(self._SUPPORTED_SUFFIXES_TUPLE)
     
-    def _parallel_get_image_info(self, image_paths: List[str], total_files: int, 
-                               progress_callback: Optional[Callable] = None) -> List[Dict[str, Any]]:
+    def _collect_image_info(self, image_entries: Iterable[Tuple[str, os.stat_result]], 
+                            progress_callback: Optional[Callable] = None) -> List[Dict[str, Any]]:
         """
-        并行获取图片信息
+        收集图片信息
+        
+        扫描阶段只根据遍历目录时已获取的stat结果构造信息字典，没有阻塞操作，
+        直接在当前线程中边遍历边处理，不再经过线程池分发
         
         Args:
-            image_paths: 图片文件路径列表
-            total_files: 总文件数（用于进度计算）
+            image_entries: (图片文件路径, stat结果) 迭代器
             progress_callback: 进度回调函数
             
         Returns:
@@ -115,80 +130,55 @@ class ImageScanner:
         """
         image_files = []
         processed_count = 0
+        last_emit = time.monotonic()
         
-        # 根据文件数量动态调整线程数
-        max_workers = min(8, len(image_paths) // 10 + 1) if image_paths else 1
-        
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # 提交所有任务
-            future_to_path = {
-                executor.submit(self._get_image_info, path): path 
-                for path in image_paths
-            }
+        for path, stat_result in image_entries:
+            file_info = self._get_file_stat_info(path, stat_result)
+            if file_info:
+                image_files.append(file_info)
             
-            # 处理完成的任务
-            for future in as_completed(future_to_path):
-                path = future_to_path[future]
-                try:
-                    file_info = future.result()
-                    if file_info:
-                        with self._lock:
-                            image_files.append(file_info)
-                        
-                    processed_count += 1
-                    if progress_callback and total_files > 0:
-                        progress_percent = min(90, 10 + int((processed_count / total_files) * 80))
-                        progress_callback(progress_percent, f"已扫描: {processed_count}/{total_files} - {os.path.basename(path)}")
-                        
-                except Exception as e:
-                    print(f"处理文件 {path} 时发生错误: {e}")
+            processed_count += 1
+            if progress_callback:
+                # 限制进度回调频率（每秒最多约20次），避免大量跨线程信号阻塞UI
+                now = time.monotonic()
+                if now - last_emit > 0.05:
+                    last_emit = now
+                    progress = 10 + 85 * processed_count // (processed_count + _PROGRESS_HALF_COUNT)
+                    progress_callback(progress, f"已扫描: {processed_count} - {os.path.basename(path)}")
         
         return image_files
     
-    def _get_image_info(self, file_path: str) -> Optional[Dict[str, Any]]:
+    def _get_file_stat_info(self, file_path: str, 
+                            stat_result: Optional[os.stat_result] = None) -> Optional[Dict[str, Any]]:
         """
-        获取图片文件的详细信息
+        获取图片文件的基本信息（仅stat信息和扩展名）
+        
+        图片尺寸、格式等需要读取文件内容的信息延迟到重复检测阶段按需获取
         
         Args:
             file_path: 图片文件路径
+            stat_result: 遍历目录时已获取的stat结果，为None时重新获取
             
         Returns:
             图片文件信息字典，如果无法处理则返回None
         """
         try:
+            if stat_result is None:
+                stat_result = os.stat(file_path)
+            
             # 检查文件大小
-            file_size = os.path.getsize(file_path)
+            file_size = stat_result.st_size
             if file_size > self.max_file_size:
                 return None
             
-            # 获取基本信息
-            file_info = {
+            return {
                 'path': file_path,
                 'name': os.path.basename(file_path),
                 'size': file_size,
-                'mtime': os.path.getmtime(file_path)
+                'mtime': stat_result.st_mtime,
+                'extension': os.path.splitext(file_path)[1].lower()
             }
             
-            # 尝试使用PIL获取图片信息
-            try:
-                with Image.open(file_path) as img:
-                    file_info['width'], file_info['height'] = img.size
-                    file_info['format'] = img.format
-                    file_info['mode'] = img.mode
-            except Exception as e:
-                # 如果PIL失败，尝试使用OpenCV
-                try:
-                    img = cv2.imread(file_path)
-                    if img is not None:
-                        height, width = img.shape[:2]
-                        file_info['width'] = width
-                        file_info['height'] = height
-                        file_info['format'] = 'OpenCV'
-                except Exception as cv2_err:
-                    print(f"无法获取图片信息 {file_path}: {str(e)}, {str(cv2_err)}")
-            
-            return file_info
-            
         except Exception as e:
             print(f"处理文件 {file_path} 时发生错误: {str(e)}")
-            return None
\ No newline at end of file
+            return None
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+扫描结果
+Scan Result
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+@dataclass
+class ScanResult:
+    """
+    扫描结果
+    
+    直接持有扫描器返回的文件信息列表，不复制、不转换；
+    汇总统计（总字节数、总字符数、各扩展名文件数）由扫描器在扫描过程中一并累计；
+    按大小、时长过滤时临时取出对应字段的数值数组计算掩码，用完即弃，不常驻内存
+    """
+    
+    files: List[Dict[str, Any]]
+    total_bytes: int = 0
+    total_chars: int = 0
+    by_ext: Counter = field(default_factory=Counter)
+    
+    @classmethod
+    def from_files(cls, files: List[Dict[str, Any]], total_bytes: Optional[int] = None,
+                   total_chars: Optional[int] = None, by_ext: Optional[Counter] = None) -> 'ScanResult':
+        """
+        从文件信息列表构建，未给出的汇总统计按文件信息计算
+        
+        Args:
+            files: 文件信息字典列表
+            total_bytes: 扫描时累计的总字节数
+            total_chars: 扫描时累计的总字符数
+            by_ext: 扫描时累计的各扩展名文件数
+        
+        Returns:
+            扫描结果
+        """
+        if total_bytes is None:
+            total_bytes = sum(f.get('size', 0) for f in files)
+        if total_chars is None:
+            total_chars = sum(f.get('char_count') or 0 for f in files)
+        if by_ext is None:
+            by_ext = Counter(f.get('extension', '') for f in files)
+        return cls(files=files, total_bytes=total_bytes, total_chars=total_chars, by_ext=by_ext)
+    
+    def __len__(self) -> int:
+        return len(self.files)
+    
+    def _values(self, name: str) -> np.ndarray:
+        """取出数值字段组成的临时数组（缺失按0计）"""
+        return np.fromiter((f.get(name) or 0 for f in self.files), dtype=np.float64,
+                           count=len(self.files))
+    
+    def filter_by_size(self, min_size: int = 0, max_size: Optional[int] = None) -> 'ScanResult':
+        """
+        按文件大小过滤
+        
+        Args:
+            min_size: 最小文件大小（字节）
+            max_size: 最大文件大小（字节）
+        
+        Returns:
+            过滤后的扫描结果
+        """
+        sizes = self._values('size')
+        mask = sizes >= min_size
+        if max_size is not None:
+            mask &= sizes <= max_size
+        return self._take(mask)
+    
+    def filter_by_duration(self, min_duration: float = 0,
+                           max_duration: Optional[float] = None) -> 'ScanResult':
+        """
+        按视频时长过滤
+        
+        Args:
+            min_duration: 最小时长（秒）
+            max_duration: 最大时长（秒）
+        
+        Returns:
+            过滤后的扫描结果
+        """
+        durations = self._values('duration')
+        mask = durations >= min_duration
+        if max_duration is not None:
+            mask &= durations <= max_duration
+        return self._take(mask)
+    
+    def _take(self, mask: np.ndarray) -> 'ScanResult':
+        """按布尔掩码选取子集，汇总统计按选中的文件重新计算"""
+        return ScanResult.from_files([self.files[i] for i in np.flatnonzero(mask)])
@@ -6,87 +6,724 @@ Text File Scanner
 """
 
 import os
+import mmap
+import codecs
 import hashlib
-import chardet
-from typing import List, Dict, Any, Optional, Callable
-from pathlib import Path
+import logging
+import multiprocessing
+from queue import SimpleQueue, Empty
+from functools import partial
+from itertools import chain
+from collections import defaultdict, Counter
+from contextlib import contextmanager, ExitStack
+from chardet.universaldetector import UniversalDetector
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Any, Optional, Callable, Iterator, Tuple
+
+from scanner.scan_result import ScanResult
+
+try:
+    from blake3 import blake3  # 可选依赖，SIMD加速的内容哈希
+except ImportError:
+    blake3 = None
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# 扫描时跳过的常见非文档目录
+_SKIP_DIRS = frozenset({
+    '__pycache__', 'node_modules', '.git', '.svn',
+    'build', 'dist', 'target', 'bin', 'obj'
+})
+
+# 每处理多少个文件上报一次进度
+_PROGRESS_INTERVAL = 100
+
+# 扫描时每次分发给子进程的文件数
+_POOL_CHUNKSIZE = 32
+
+# 启动spawn进程池（每个子进程重新导入本模块及numpy）约需数百毫秒，
+# 待处理文件数和总字节数都低于以下阈值时串行加载更快
+_POOL_MIN_FILES = 10000
+_POOL_MIN_BYTES = 256 << 20
+
+# 统计换行符时每次切片的字节数
+_COUNT_CHUNK_SIZE = 1 << 20
+
+# 编码检测时每次喂给chardet的字节数
+_DETECT_SLICE_SIZE = 256
+
+# 字节顺序标记及其对应编码；UTF-32-LE的BOM以UTF-16-LE的BOM开头，须先于后者检查
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# chardet可能给出的简体中文编码，均按其超集GB18030处理
+_GB_ENCODINGS = frozenset({'gb2312', 'gbk', 'gb18030'})
+
+# 小于该大小的文件一次读入内存，不值得建立内存映射
+_MMAP_THRESHOLD = 1 << 20
+
+# 小文件读缓冲区池，缓冲区用完归还、在同一进程内反复使用，不再为每个文件分配新的bytes；
+# 池中缓冲区数量等于曾经同时使用的最大数量
+_BUFFER_POOL = SimpleQueue()
+
+# 启用direct_io时，不小于该大小的文件以O_DIRECT绕过页缓存读取
+_DIRECT_IO_THRESHOLD = 4 << 20
+
+# O_DIRECT要求的缓冲区地址和读取长度对齐粒度
+_DIRECT_IO_ALIGN = 4096
+
+# 超过该大小的文件使用多线程计算BLAKE3（仅在工作进程中）
+_BLAKE3_THREADS_THRESHOLD = 1 << 20
+
+# 当前进程是否为进程池工作进程。BLAKE3多线程会在进程内启动常驻线程池，
+# 之后再fork出的子进程可能继承被锁住的状态而挂起，因此主进程始终单线程计算，
+# 多线程只在由_init_worker初始化过的工作进程中使用
+_IN_WORKER = False
+
+# 内容哈希值带有算法前缀（如'b3:'、'md5:'），只有同一算法的哈希值才可比较
+CONTENT_HASH_ALGORITHM = 'b3' if blake3 is not None else 'md5'
+
+
+def _init_worker():
+    """进程池工作进程初始化函数，标记当前进程允许多线程计算哈希"""
+    global _IN_WORKER
+    _IN_WORKER = True
+
+
+def _content_hash(data) -> str:
+    """
+    计算内容哈希，已安装blake3时使用BLAKE3，否则使用MD5
+    
+    Args:
+        data: 字节串或文件映射对象
+        
+    Returns:
+        带算法前缀的哈希值
+    """
+    if blake3 is not None:
+        use_threads = _IN_WORKER and len(data) >= _BLAKE3_THREADS_THRESHOLD
+        max_threads = blake3.AUTO if use_threads else 1
+        return 'b3:' + blake3(data, max_threads=max_threads).hexdigest(length=16)
+    return 'md5:' + hashlib.md5(data).hexdigest()
+
+
+def _file_content_hash(path: str, direct_io: bool = False, plain: bool = False) -> str:
+    """
+    按路径计算文件内容哈希
+    
+    在工作进程中、已安装blake3且文件较大时由update_mmap在库内部映射文件并多线程计算，
+    不经过Python层缓冲；其余情况读入内容后交给_content_hash，两者结果一致
+    
+    Args:
+        path: 文件路径
+        direct_io: 是否对大文件绕过页缓存读取（此时不使用update_mmap）
+        plain: 是否使用朴素读取（基准模式，不使用update_mmap）
+        
+    Returns:
+        带算法前缀的哈希值
+    """
+    if (blake3 is not None and _IN_WORKER and not direct_io and not plain
+            and os.path.getsize(path) >= _BLAKE3_THREADS_THRESHOLD):
+        hasher = blake3(max_threads=blake3.AUTO)
+        hasher.update_mmap(path)
+        return 'b3:' + hasher.hexdigest(length=16)
+    
+    with _read_file(path, direct_io, plain) as buf:
+        return _content_hash(buf)
+
+
+def _read_direct(path: str, size: int) -> Optional[Tuple[mmap.mmap, int]]:
+    """
+    以O_DIRECT读取整个文件，绕过页缓存，一次性扫描不会挤占缓存中的其他数据
+    
+    读入匿名内存映射（按页对齐），读取长度向上对齐到4KB
+    
+    Args:
+        path: 文件路径
+        size: 文件大小
+        
+    Returns:
+        (缓冲区, 实际读取字节数) 元组；平台或文件系统不支持O_DIRECT（如tmpfs）时返回None
+    """
+    flag = getattr(os, 'O_DIRECT', 0)
+    if not flag:
+        return None
+    try:
+        fd = os.open(path, os.O_RDONLY | flag)
+    except OSError:
+        return None
+    
+    try:
+        buf = mmap.mmap(-1, -(-size // _DIRECT_IO_ALIGN) * _DIRECT_IO_ALIGN)
+        view = memoryview(buf)
+        got = 0
+        try:
+            while got < size:
+                n = os.readv(fd, [view[got:]])
+                if n == 0:
+                    break
+                got += n
+        except OSError:
+            view.release()
+            buf.close()
+            return None
+        view.release()
+        return buf, got
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def _read_file(path: str, direct_io: bool = False, plain: bool = False) -> Iterator[Any]:
+    """
+    以只读方式获取文件的全部内容
+    
+    小文件用readinto读入缓冲区池中的可复用缓冲区；大文件使用内存映射，不占用额外内存，退出时关闭映射；
+    启用direct_io时，4MB以上的文件以O_DIRECT读入对齐缓冲区，不经过页缓存；
+    plain为True时不做任何优化，整个文件读入新的bytes（基准模式）。
+    产出的内容只在with块内有效，退出后缓冲区会被其他文件复用
+    
+    Args:
+        path: 文件路径
+        direct_io: 是否对大文件绕过页缓存读取
+        plain: 是否使用朴素读取
+        
+    Yields:
+        文件内容（bytes、memoryview或mmap对象，均可直接传给哈希函数）
+    """
+    if plain:
+        with open(path, 'rb') as f:
+            yield f.read()
+        return
+    
+    with open(path, 'rb', buffering=0) as f:
+        fd = f.fileno()
+        size = os.fstat(fd).st_size
+        if size < _MMAP_THRESHOLD:
+            try:
+                buf = _BUFFER_POOL.get_nowait()
+            except Empty:
+                buf = bytearray(_MMAP_THRESHOLD)
+            try:
+                view = memoryview(buf)
+                yield view[:f.readinto(view[:size])]
+            finally:
+                _BUFFER_POOL.put(buf)
+            return
+        
+        direct = _read_direct(path, size) if direct_io and size >= _DIRECT_IO_THRESHOLD else None
+        if direct is not None:
+            buf, got = direct
+            view = memoryview(buf)
+            data = view[:got]
+            try:
+                yield data
+            finally:
+                data.release()
+                view.release()
+                buf.close()
+            return
+        
+        mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        try:
+            yield mm
+        finally:
+            mm.close()
+
+
+def _count_newlines(buf) -> int:
+    """
+    统计内容中的换行符数量
+    
+    memoryview和mmap对象没有count方法：缓冲区池的memoryview从底层bytearray起始处切出，
+    直接在bytearray的对应范围内计数；mmap和O_DIRECT缓冲区按1MB切片后用bytes.count在C层计数，
+    避免一次性复制整个文件
+    
+    Args:
+        buf: 字节串、memoryview或文件映射对象
+        
+    Returns:
+        换行符数量
+    """
+    if isinstance(buf, bytes):
+        return buf.count(b'\n')
+    if isinstance(buf, memoryview) and isinstance(buf.obj, bytearray):
+        return buf.obj.count(b'\n', 0, buf.nbytes)
+    return sum(bytes(buf[pos:pos + _COUNT_CHUNK_SIZE]).count(b'\n') 
+               for pos in range(0, len(buf), _COUNT_CHUNK_SIZE))
+
+
+def _is_wide_encoding(encoding: str) -> bool:
+    """判断是否为换行符占多个字节的编码（UTF-16/UTF-32）"""
+    return encoding.lower().replace('_', '-').startswith(('utf-16', 'utf-32'))
+
+
+def _hash_and_stat(path: str, direct_io: bool = False, 
+                   plain: bool = False) -> Tuple[str, Optional[str], int, int, int]:
+    """
+    单次读取同时计算文件哈希和行数（也用作进程池工作函数，须为模块级函数以便序列化）
+    
+    Args:
+        path: 文件路径
+        direct_io: 是否对大文件绕过页缓存读取
+        plain: 是否使用朴素读取（基准模式）
+        
+    Returns:
+        (文件路径, 内容哈希值, 文件大小, 行数, 字符数) 元组，失败时哈希值为None
+    """
+    try:
+        with _read_file(path, direct_io, plain) as buf:
+            size = len(buf)
+            if size == 0:
+                return path, _content_hash(b''), 0, 0, 0
+            
+            # 非空文件的行数为换行符数+1
+            content_hash = _content_hash(buf)
+            line_count = _count_newlines(buf) + 1
+        
+        # 字符数按字节数计，不解码文件内容
+        return path, content_hash, size, line_count, size
+        
+    except OSError:
+        return path, None, 0, 0, 0
+
+def _detect_encoding(path: str) -> str:
+    """
+    快速检测文件编码（只读取文件前1KB）
+    
+    Args:
+        path: 文件路径
+        
+    Returns:
+        检测到的编码，无法确定时返回'utf-8'
+    """
+    try:
+        # 只读取文件前1KB来检测编码，减少I/O
+        with open(path, 'rb', buffering=0) as f:
+            raw_data = f.read(1024)  # 只读取前1KB
+            
+        if not raw_data:
+            return 'utf-8'  # 空文件默认UTF-8
+        
+        # BOM只可能出现在文件开头，按前缀直接确定编码，无需扫描内容
+        for bom, bom_encoding in _BOMS:
+            if raw_data.startswith(bom):
+                return bom_encoding
+        
+        # 绝大多数文件是UTF-8，只尝试一次解码
+        try:
+            raw_data.decode('utf-8')
+            return 'utf-8'
+        except UnicodeDecodeError as e:
+            # 截断在多字节字符中间导致的失败仍视为UTF-8
+            if e.reason == 'unexpected end of data':
+                return 'utf-8'
+        
+        # 其次是中文文本常用的GB18030（兼容GBK/GB2312），严格解码一次，
+        # 短文本交给chardet时置信度往往很低而被误判为UTF-8；截断在多字节字符中间不算失败
+        try:
+            codecs.getincrementaldecoder('gb18030')().decode(raw_data, final=False)
+            return 'gb18030'
+        except UnicodeDecodeError:
+            pass
+        
+        # 逐段喂给chardet，一旦能确定编码立即停止
+        detector = UniversalDetector()
+        for pos in range(0, len(raw_data), _DETECT_SLICE_SIZE):
+            detector.feed(raw_data[pos:pos + _DETECT_SLICE_SIZE])
+            if detector.done:
+                break
+        detector.close()
+        
+        encoding = detector.result.get('encoding')
+        confidence = detector.result.get('confidence') or 0
+        
+        if not encoding or confidence < 0.5:  # 降低阈值，提高速度
+            return 'utf-8'  # 默认编码
+        
+        # GB2312/GBK是GB18030的子集，统一按GB18030解码，避免超出子集的字符被丢弃
+        if encoding.lower() in _GB_ENCODINGS:
+            return 'gb18030'
+                    
+        return encoding
+        
+    except Exception as e:
+        logger.warning("编码检测失败 %s: %s", path, e)
+        return 'utf-8'  # 失败时返回默认编码而非None
+
+
+def _count_decoded(path: str, encoding: str) -> Tuple[int, int]:
+    """
+    解码文件内容后按码点统计行数和字符数（用于UTF-16/UTF-32）
+    
+    Args:
+        path: 文件路径
+        encoding: 文件编码
+        
+    Returns:
+        (行数, 字符数) 元组
+    """
+    try:
+        line_count = 0
+        char_count = 0
+        
+        with open(path, 'r', encoding=encoding, errors='ignore') as f:
+            # 分块读取避免内存问题，每次读取64KB
+            chunk_size = 65536
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                char_count += len(chunk)
+                line_count += chunk.count('\n')
+        
+        # 如果文件不以换行符结尾，行数+1
+        if char_count > 0:
+            line_count += 1
+            
+        return line_count, char_count
+        
+    except Exception as e:
+        logger.warning("获取文件统计信息失败 %s: %s", path, e)
+        return 0, 0
+
+
+def _file_details(path: str, encoding: Optional[str] = None, direct_io: bool = False,
+                  plain: bool = False) -> Tuple[str, Optional[str], int, int, int, Optional[str]]:
+    """
+    计算单个文件的全部详细信息：内容哈希、大小、行数、字符数和编码
+    
+    串行加载与进程池加载共用该函数，两条路径得到的结果完全一致
+    
+    Args:
+        path: 文件路径
+        encoding: 已知的文件编码（None时自动检测）
+        direct_io: 是否对大文件绕过页缓存读取
+        plain: 是否使用朴素读取（基准模式）
+        
+    Returns:
+        (文件路径, 内容哈希值, 文件大小, 行数, 字符数, 编码) 元组，失败时哈希值为None
+    """
+    try:
+        path, content_hash, size, line_count, char_count = _hash_and_stat(path, direct_io, plain)
+        if content_hash is None:
+            return path, None, 0, 0, 0, None
+        
+        # 检测编码（供后续读取文本内容时使用）
+        if encoding is None:
+            encoding = _detect_encoding(path)
+        
+        # UTF-16/UTF-32中换行符不是单字节，按字节统计的结果不准确，改为按文本统计
+        if _is_wide_encoding(encoding):
+            line_count, char_count = _count_decoded(path, encoding)
+        
+        return path, content_hash, size, line_count, char_count, encoding
+        
+    except Exception as e:
+        # 单个文件出错（如扫描后被截断为空，映射时抛出ValueError）只标记该文件失败，
+        # 不能中断进程池中的整个扫描
+        logger.warning("加载文件详细信息失败 %s: %s", path, e)
+        return path, None, 0, 0, 0, None
+
+
+def _apply_details(file_info: Dict[str, Any], 
+                   details: Tuple[str, Optional[str], int, int, int, Optional[str]]) -> bool:
+    """
+    将_file_details的结果写入文件信息字典
+    
+    Args:
+        file_info: 文件信息字典
+        details: _file_details返回的元组
+        
+    Returns:
+        是否成功加载详细信息
+    """
+    path, content_hash, size, line_count, char_count, encoding = details
+    if content_hash is None:
+        logger.warning("加载文件详细信息失败 %s", path)
+        return False
+    
+    file_info['content_hash'] = content_hash
+    file_info['size'] = size
+    file_info['line_count'] = line_count
+    file_info['char_count'] = char_count
+    file_info['encoding'] = encoding
+    return True
+
+
+def _load_file_details(file_info: Dict[str, Any], direct_io: bool = False, 
+                       plain: bool = False) -> Dict[str, Any]:
+    """
+    加载单个文件的详细信息（进程池工作函数，须为模块级函数以便序列化）
+    
+    扫描设置由调用方通过functools.partial传入，不在子进程中构造扫描器
+    
+    Args:
+        file_info: 只含基本信息的文件信息字典
+        direct_io: 是否对大文件绕过页缓存读取
+        plain: 是否使用朴素读取（基准模式）
+        
+    Returns:
+        填充了编码、哈希和统计信息的文件信息字典
+    """
+    if file_info.get('content_hash') is None:
+        _apply_details(file_info, _file_details(file_info['path'], file_info.get('encoding'),
+                                                direct_io, plain))
+    return file_info
+
+
+def _file_details_batch(items: List[Tuple[str, Optional[str]]], direct_io: bool = False,
+                        plain: bool = False) -> List[Tuple[str, Optional[str], int, int, int, Optional[str]]]:
+    """
+    批量计算文件详细信息（进程池工作函数，一次提交处理多个文件以分摊进程间通信开销）
+    
+    Args:
+        items: (文件路径, 已知编码) 元组列表
+        direct_io: 是否对大文件绕过页缓存读取
+        plain: 是否使用朴素读取（基准模式）
+        
+    Returns:
+        每个文件的_file_details结果列表
+    """
+    return [_file_details(path, encoding, direct_io, plain) for path, encoding in items]
 
 class TextScanner:
     """文本文件扫描器"""
     
-    # 支持的文本文件扩展名
-    SUPPORTED_EXTENSIONS = {
-        '.txt', '.md', '.py', '.js', '.html', '.htm', '.css', '.xml', '.json',
-        '.csv', '.log', '.conf', '.cfg', '.ini', '.yml', '.yaml', '.sql',
-        '.java', '.cpp', '.c', '.h', '.hpp', '.cs', '.php', '.rb', '.go',
-        '.rs', '.swift', '.kt', '.scala', '.pl', '.sh', '.bat', '.ps1',
-        '.tex', '.rtf', '.rst', '.wiki', '.adoc', '.asciidoc'
-    }
+    # 支持的文本文件扩展名（不含点号，小写）
+    SUPPORTED_EXTENSIONS = frozenset({
+        'txt', 'md', 'py', 'js', 'html', 'htm', 'css', 'xml', 'json',
+        'csv', 'log', 'conf', 'cfg', 'ini', 'yml', 'yaml', 'sql',
+        'java', 'cpp', 'c', 'h', 'hpp', 'cs', 'php', 'rb', 'go',
+        'rs', 'swift', 'kt', 'scala', 'pl', 'sh', 'bat', 'ps1',
+        'tex', 'rtf', 'rst', 'wiki', 'adoc', 'asciidoc'
+    })
     
-    def __init__(self, max_file_size: int = 50 * 1024 * 1024):  # 50MB
+    def __init__(self, max_file_size: int = 50 * 1024 * 1024,  # 50MB
+                 batch_min: int = 4, batch_max: int = 64, 
+                 max_workers: Optional[int] = None, direct_io: bool = False,
+                 baseline_mode: bool = False, pool_min_files: int = _POOL_MIN_FILES,
+                 pool_min_bytes: int = _POOL_MIN_BYTES):
         """
         初始化文本扫描器
         
         Args:
             max_file_size: 最大文件大小限制（字节）
+            batch_min: 批量计算哈希时每批的最小文件数
+            batch_max: 批量计算哈希时每批的最大文件数
+            max_workers: 扫描时计算哈希的最大进程数（None表示使用CPU核心数）
+            direct_io: 是否以O_DIRECT读取4MB以上的文件，避免一次性扫描污染页缓存（仅Linux等支持的平台）
+            baseline_mode: 基准模式，单线程、不使用进程池/线程池/内存映射/缓冲区池，
+                           按朴素实现处理文件，用于性能测试时在本机测量对比基准
+            pool_min_files: 待加载文件数达到该值时才使用进程池
+            pool_min_bytes: 待加载文件总大小达到该值（字节）时才使用进程池
         """
         self.max_file_size = max_file_size
+        self.direct_io = direct_io
+        self.baseline_mode = baseline_mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.batch_min = max(1, batch_min)
+        self.batch_max = max(self.batch_min, batch_max)
+        self.pool_min_files = pool_min_files
+        self.pool_min_bytes = pool_min_bytes
         
     def scan_directory(self, directory_path: str, 
-                      progress_callback: Optional[Callable] = None) -> List[Dict[str, Any]]:
+                      progress_callback: Optional[Callable] = None,
+                      load_details: bool = False) -> List[Dict[str, Any]]:
         """
         扫描目录中的文本文件
         
         Args:
             directory_path: 目录路径
             progress_callback: 进度回调函数
+            load_details: 是否在扫描时为所有文件加载详细信息（哈希、编码、行数等）；
+                默认只获取基本信息，详细信息由ensure_file_details等按需加载
             
         Returns:
             文本文件信息列表
         """
+        return list(self._iter_loaded(directory_path, progress_callback, load_details))
+    
+    def scan(self, directory_path: str, 
+             progress_callback: Optional[Callable] = None,
+             load_details: bool = False) -> ScanResult:
+        """
+        扫描目录中的文本文件，同时累计总字节数、总字符数和各扩展名文件数
+        
+        Args:
+            directory_path: 目录路径
+            progress_callback: 进度回调函数
+            load_details: 是否在扫描时加载详细信息（不加载时总字符数为0）
+            
+        Returns:
+            扫描结果（文件信息及汇总统计）
+        """
         text_files = []
+        total_bytes = 0
+        total_chars = 0
+        by_ext = Counter()
+        
+        for file_info in self._iter_loaded(directory_path, progress_callback, load_details):
+            text_files.append(file_info)
+            total_bytes += file_info['size']
+            total_chars += file_info['char_count'] or 0
+            by_ext[file_info['extension']] += 1
+        
+        return ScanResult.from_files(text_files, total_bytes=total_bytes, 
+                                     total_chars=total_chars, by_ext=by_ext)
+    
+    def _iter_loaded(self, directory_path: str, progress_callback: Optional[Callable] = None,
+                     load_details: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        扫描目录，逐个产出文本文件信息（scan_directory和scan共用）
         
+        Args:
+            directory_path: 目录路径
+            progress_callback: 进度回调函数
+            load_details: 是否加载详细信息
+            
+        Yields:
+            文本文件信息字典（多进程时按完成顺序）
+        """
         if not os.path.exists(directory_path):
-            return text_files
+            return
         
-        # 首先快速统计文件总数用于进度计算
-        total_files = 0
         processed_files = 0
         
         if progress_callback:
-            progress_callback(5, "正在统计文件数量...")
-            for root, dirs, files in os.walk(directory_path):
-                dirs[:] = [d for d in dirs if not d.startswith('.') and 
-                          d.lower() not in {'__pycache__', 'node_modules', '.git', '.svn', 
-                                           'build', 'dist', 'target', 'bin', 'obj'}]
-                for file in files:
-                    if self._is_text_file(file):
-                        total_files += 1
+            progress_callback(5, "正在扫描文本文件...")
+        
+        # 第一步：当前线程单次遍历目录，各文件的stat交给线程池并发执行，
+        # 在机械盘/网络盘上隐藏逐个stat的I/O延迟（stat期间释放GIL）；基准模式下在当前线程中逐个stat
+        candidates = []
+        next_report = _PROGRESS_INTERVAL
+        entries = chain.from_iterable(self._iter_scandir(directory_path))
+        with ExitStack() as stack:
+            if self.baseline_mode:
+                infos = map(self._get_entry_info, entries)
+            else:
+                executor = stack.enter_context(ThreadPoolExecutor(max_workers=self.max_workers * 2))
+                infos = executor.map(self._get_entry_info, entries)
+            for file_info in infos:
+                if file_info:
+                    candidates.append(file_info)
+                
+                processed_files += 1
+                if progress_callback and processed_files >= next_report:
+                    next_report = processed_files + _PROGRESS_INTERVAL
+                    progress_callback(10, f"已扫描: {processed_files} 个文件")
+        
+        # 第二步：需要时计算哈希和统计信息（CPU密集），文件足够多时使用多进程并按完成顺序产出结果
+        total = len(candidates)
+        if not load_details:
+            yield from candidates
+        elif not self._use_pool(candidates, min(self.max_workers, total)):
+            for file_info in candidates:
+                self.ensure_file_details(file_info)
+                yield file_info
+        else:
+            loaded = 0
+            next_report = _PROGRESS_INTERVAL
+            # 使用spawn启动子进程：fork会复制父进程中其他线程持有的锁，可能导致子进程挂起
+            context = multiprocessing.get_context('spawn')
+            with context.Pool(min(self.max_workers, total), initializer=_init_worker) as pool:
+                load = partial(_load_file_details, direct_io=self.direct_io, 
+                               plain=self.baseline_mode)
+                for file_info in pool.imap_unordered(load, candidates, 
+                                                     chunksize=_POOL_CHUNKSIZE):
+                    yield file_info
+                    loaded += 1
+                    if progress_callback and loaded >= next_report:
+                        next_report = loaded + _PROGRESS_INTERVAL
+                        progress = 10 + int(loaded / total * 80)
+                        progress_callback(progress, f"已计算哈希: {loaded}/{total}")
+        
+        if progress_callback:
+            progress_callback(95, f"扫描完成，找到 {total} 个文本文件")
+    
+    def _use_pool(self, file_infos: List[Dict[str, Any]], workers: int) -> bool:
+        """
+        判断加载这些文件的详细信息时是否值得启动进程池
+        
+        Args:
+            file_infos: 待加载的文件信息列表
+            workers: 可用的进程数
             
-        # 遍历目录
-        for root, dirs, files in os.walk(directory_path):
-            # 跳过隐藏目录和常见的非文档目录
-            dirs[:] = [d for d in dirs if not d.startswith('.') and 
-                      d.lower() not in {'__pycache__', 'node_modules', '.git', '.svn', 
-                                       'build', 'dist', 'target', 'bin', 'obj'}]
+        Returns:
+            文件数或总字节数达到阈值且可使用多个进程时返回True
+        """
+        if self.baseline_mode or workers < 2:
+            return False
+        if len(file_infos) >= self.pool_min_files:
+            return True
+        return sum(file_info.get('size', 0) for file_info in file_infos) >= self.pool_min_bytes
+    
+    def _iter_scandir(self, root: str) -> Iterator[List[os.DirEntry]]:
+        """
+        递归遍历目录，按目录批量产出文本文件的目录项
+        
+        DirEntry的is_dir/is_file结果来自目录项本身，不会额外触发stat（符号链接除外）；
+        指向文件的符号链接按其目标文件处理，指向目录的符号链接不进入，避免循环；
+        文件的stat由调用方通过DirEntry.stat获取并缓存在目录项上
+        （Windows上DirEntry.stat直接来自目录项，无需系统调用）
+        
+        Args:
+            root: 目录路径
             
-            for file in files:
-                if self._is_text_file(file):
-                    file_path = os.path.join(root, file)
-                    file_info = self._get_file_info(file_path)
-                    
-                    if file_info:
-                        text_files.append(file_info)
-                    
-                    processed_files += 1
-                    if progress_callback and total_files > 0:
-                        progress_percent = min(90, 10 + int((processed_files / total_files) * 80))
-                        progress_callback(progress_percent, f"已扫描: {processed_files}/{total_files} - {os.path.basename(file)}")
+        Yields:
+            每个目录中的文本文件目录项列表（不含空列表）
+        """
+        try:
+            with os.scandir(root) as it:
+                entries = list(it)
+        except OSError:
+            return
         
-        if progress_callback:
-            progress_callback(95, f"扫描完成，找到 {len(text_files)} 个文本文件")
+        prefix = root if root.endswith(os.sep) else root + os.sep
+        extensions = self.SUPPORTED_EXTENSIONS
+        file_entries = []
+        sub_dirs = []
+        for entry in entries:
+            try:
+                name = entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    # 跳过隐藏目录和常见的非文档目录
+                    if not name.startswith('.') and name.lower() not in _SKIP_DIRS:
+                        sub_dirs.append(prefix + name)
+                elif entry.is_file():
+                    dot = name.rfind('.')
+                    if dot != -1 and name[dot + 1:].lower() in extensions:
+                        file_entries.append(entry)
+            except OSError:
+                continue
+        
+        if file_entries:
+            yield file_entries
+        for sub_dir in sub_dirs:
+            yield from self._iter_scandir(sub_dir)
+    
+    def _get_entry_info(self, entry: os.DirEntry) -> Optional[Dict[str, Any]]:
+        """
+        根据目录项获取文件信息（线程池工作函数）
         
-        return text_files
+        Args:
+            entry: 文件目录项
+            
+        Returns:
+            文件信息字典，如果文件无法访问则返回None
+        """
+        try:
+            stat = entry.stat()
+        except OSError as e:
+            logger.warning("无法访问文件 %s: %s", entry.path, e)
+            return None
+        return self._get_file_info(entry.path, stat)
     
     def _is_text_file(self, filename: str) -> bool:
         """
@@ -98,21 +735,24 @@ class TextScanner:
         Returns:
             是否为文本文件
         """
-        file_ext = Path(filename).suffix.lower()
-        return file_ext in self.SUPPORTED_EXTENSIONS
+        dot = filename.rfind('.')
+        return dot != -1 and filename[dot + 1:].lower() in self.SUPPORTED_EXTENSIONS
     
-    def _get_file_info(self, file_path: str) -> Optional[Dict[str, Any]]:
+    def _get_file_info(self, file_path: str, 
+                       stat: Optional[os.stat_result] = None) -> Optional[Dict[str, Any]]:
         """
         获取文件信息（超级优化版本）
         
         Args:
             file_path: 文件路径
+            stat: 遍历目录时已获取的stat结果（None时重新调用os.stat）
             
         Returns:
             文件信息字典，如果文件无法访问则返回None
         """
         try:
-            stat = os.stat(file_path)
+            if stat is None:
+                stat = os.stat(file_path)
             file_size = stat.st_size
             
             # 检查文件大小限制
@@ -129,7 +769,7 @@ class TextScanner:
                 'name': os.path.basename(file_path),
                 'size': file_size,
                 'mtime': stat.st_mtime,
-                'extension': Path(file_path).suffix.lower(),
+                'extension': os.path.splitext(file_path)[1].lower(),
                 # 延迟计算的字段
                 'encoding': None,  # 将在需要时计算
                 'line_count': None,  # 将在需要时计算
@@ -138,7 +778,7 @@ class TextScanner:
             }
             
         except (OSError, IOError) as e:
-            print(f"无法访问文件 {file_path}: {e}")
+            logger.warning("无法访问文件 %s: %s", file_path, e)
             return None
     
     def ensure_file_details(self, file_info: Dict[str, Any]) -> bool:
@@ -152,37 +792,135 @@ class TextScanner:
             是否成功加载详细信息
         """
         try:
-            file_path = file_info['path']
-            
             # 如果已经有详细信息，直接返回
             if file_info.get('content_hash') is not None:
                 return True
             
-            # 检测编码
-            if file_info.get('encoding') is None:
-                encoding = self._detect_encoding_fast(file_path)
-                if not encoding:
-                    return False
-                file_info['encoding'] = encoding
+            # 单次读取同时计算哈希和统计信息（按原始字节，无需先检测编码），再检测编码
+            return _apply_details(file_info, _file_details(
+                file_info['path'], file_info.get('encoding'), self.direct_io, self.baseline_mode))
+            
+        except Exception as e:
+            logger.warning("加载文件详细信息失败 %s: %s", file_info.get('path', 'unknown'), e)
+            return False
+    
+    def ensure_encoding(self, file_info: Dict[str, Any]) -> str:
+        """
+        确保文件编码已检测（只读取文件开头，不计算哈希）
+        
+        Args:
+            file_info: 文件信息字典
             
-            # 计算哈希
-            if file_info.get('content_hash') is None:
-                content_hash = self._calculate_file_hash(file_path, file_info['encoding'])
-                if content_hash is None:
-                    return False
-                file_info['content_hash'] = content_hash
+        Returns:
+            文件编码
+        """
+        if file_info.get('encoding') is None:
+            file_info['encoding'] = _detect_encoding(file_info['path'])
+        return file_info['encoding']
+    
+    def ensure_many(self, file_infos: List[Dict[str, Any]], 
+                    max_workers: Optional[int] = None, 
+                    progress_callback: Optional[Callable] = None) -> int:
+        """
+        批量加载文件详细信息（多进程并行计算哈希、行数和编码）
+        
+        与ensure_file_details填充相同的字段，结果一致。
+        文件数和总大小都低于pool_min_files/pool_min_bytes时串行加载，不启动进程池。
+        文件按批提交，批大小根据在途批次与进程数之比在batch_min和batch_max之间自适应调整
+        
+        Args:
+            file_infos: 文件信息字典列表
+            max_workers: 最大进程数（None表示使用CPU核心数）
+            progress_callback: 进度回调函数
             
-            # 获取统计信息
-            if file_info.get('line_count') is None:
-                line_count, char_count = self._get_file_stats_fast(file_path, file_info['encoding'])
-                file_info['line_count'] = line_count
-                file_info['char_count'] = char_count
+        Returns:
+            成功加载详细信息的文件数
+        """
+        pending = {info['path']: info for info in file_infos 
+                   if info.get('content_hash') is None}
+        loaded = len(file_infos) - len(pending)
+        
+        # 文件太少太小时启动进程池得不偿失，直接串行处理；基准模式始终串行
+        workers = min(max_workers or os.cpu_count() or 4, len(pending))
+        if not self._use_pool(list(pending.values()), workers):
+            return loaded + sum(self.ensure_file_details(info) for info in pending.values())
+        
+        paths = list(pending)
+        total = len(paths)
+        next_pos = 0
+        finished = 0
+        batch_size = self.batch_min
+        in_flight = set()
+        
+        # 使用spawn启动子进程，避免fork继承父进程中其他线程持有的锁
+        with ProcessPoolExecutor(max_workers=workers, 
+                                 mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker) as executor:
+            while next_pos < total or in_flight:
+                # 保持每个进程最多两批在途，提交前按在途比例调整批大小
+                while next_pos < total and len(in_flight) < workers * 2:
+                    batch_size = self._next_batch_size(batch_size, len(in_flight) / workers)
+                    batch = [(path, pending[path].get('encoding')) 
+                             for path in paths[next_pos:next_pos + batch_size]]
+                    next_pos += len(batch)
+                    in_flight.add(executor.submit(_file_details_batch, batch, self.direct_io))
+                
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for details in future.result():
+                        finished += 1
+                        loaded += _apply_details(pending[details[0]], details)
+                
+                if progress_callback:
+                    progress_callback(int(finished / total * 100), 
+                                      f"已计算哈希: {finished}/{total} (批大小 {batch_size})")
+        
+        return loaded
+    
+    def _next_batch_size(self, batch_size: int, submit_ratio: float) -> int:
+        """
+        根据在途批次与进程数之比调整下一批的大小
+        
+        Args:
+            batch_size: 当前批大小
+            submit_ratio: 在途批次数 / 进程数
             
-            return True
+        Returns:
+            下一批的大小
+        """
+        if submit_ratio > 1.0:
+            # 进程都有活干，增大批次以分摊每次提交的开销
+            return min(batch_size * 2, self.batch_max)
+        if submit_ratio < 0.25:
+            # 进程即将空闲，减小批次尽快提交
+            return max(batch_size // 2, self.batch_min)
+        return batch_size
+    
+    def ensure_details_for_duplicates(self, file_infos: List[Dict[str, Any]], 
+                                      size_tolerance: int = 0) -> List[Dict[str, Any]]:
+        """
+        只为可能重复的文件加载详细信息
+        
+        大小不同的文件不可能完全相同，先按大小分组，丢弃只有一个文件的组，
+        只对剩余文件计算哈希
+        
+        Args:
+            file_infos: 文件信息字典列表
+            size_tolerance: 大小分组的区间宽度（字节），0表示按精确大小分组；
+                查找近似重复时可设为1024等，使大小相近的文件落入同一组
             
-        except Exception as e:
-            print(f"加载文件详细信息失败 {file_info.get('path', 'unknown')}: {e}")
-            return False
+        Returns:
+            已加载详细信息的候选文件列表
+        """
+        size_groups = defaultdict(list)
+        for file_info in file_infos:
+            size = file_info.get('size', 0)
+            size_groups[size // size_tolerance if size_tolerance > 0 else size].append(file_info)
+        
+        candidates = [file_info for group in size_groups.values() if len(group) > 1 
+                      for file_info in group]
+        self.ensure_many(candidates)
+        return [file_info for file_info in candidates if file_info.get('content_hash') is not None]
     
     def _detect_encoding_fast(self, file_path: str) -> Optional[str]:
         """
@@ -194,40 +932,14 @@ class TextScanner:
         Returns:
             检测到的编码，如果检测失败返回None
         """
-        try:
-            # 只读取文件前1KB来检测编码，减少I/O
-            with open(file_path, 'rb') as f:
-                raw_data = f.read(1024)  # 只读取前1KB
-                
-            if not raw_data:
-                return 'utf-8'  # 空文件默认UTF-8
-            
-            # 首先尝试常见编码，避免使用chardet
-            for test_encoding in ['utf-8', 'gbk', 'gb2312', 'latin-1']:
-                try:
-                    raw_data.decode(test_encoding)
-                    return test_encoding
-                except UnicodeDecodeError:
-                    continue
-            
-            # 如果常见编码都失败，才使用chardet
-            result = chardet.detect(raw_data)
-            encoding = result.get('encoding', 'utf-8')
-            confidence = result.get('confidence', 0)
-            
-            if confidence < 0.5:  # 降低阈值，提高速度
-                return 'utf-8'  # 默认编码
-                        
-            return encoding
-            
-        except Exception as e:
-            print(f"编码检测失败 {file_path}: {e}")
-            return 'utf-8'  # 失败时返回默认编码而非None
+        return _detect_encoding(file_path)
     
     def _get_file_stats_fast(self, file_path: str, encoding: str) -> tuple[int, int]:
         """
         快速获取文件统计信息（不读取完整内容）
         
+        只有UTF-16/UTF-32需要解码后按码点统计，其他编码直接按字节统计
+        
         Args:
             file_path: 文件路径
             encoding: 文件编码
@@ -235,57 +947,48 @@ class TextScanner:
         Returns:
             (行数, 字符数) 元组
         """
-        try:
-            line_count = 0
-            char_count = 0
-            
-            with open(file_path, 'r', encoding=encoding, errors='ignore') as f:
-                # 分块读取避免内存问题，每次读取64KB
-                chunk_size = 65536
-                while True:
-                    chunk = f.read(chunk_size)
-                    if not chunk:
-                        break
-                    char_count += len(chunk)
-                    line_count += chunk.count('\n')
+        if not _is_wide_encoding(encoding):
+            return self._count_lines_bytes(file_path)
+        return _count_decoded(file_path, encoding)
+    
+    def _count_lines_bytes(self, file_path: str) -> Tuple[int, int]:
+        """
+        按字节统计文件的行数和字符数（字符数以字节数近似）
+        
+        Args:
+            file_path: 文件路径
             
-            # 如果文件不以换行符结尾，行数+1
-            if char_count > 0:
-                line_count += 1
-                
-            return line_count, char_count
+        Returns:
+            (行数, 字符数) 元组
+        """
+        try:
+            with _read_file(file_path, self.direct_io, self.baseline_mode) as buf:
+                if not buf:
+                    return 0, 0
+                # 与按文本统计一致：非空文件的行数为换行符数+1
+                return _count_newlines(buf) + 1, len(buf)
             
         except Exception as e:
-            print(f"获取文件统计信息失败 {file_path}: {e}")
+            logger.warning("获取文件统计信息失败 %s: %s", file_path, e)
             return 0, 0
     
-    def _calculate_file_hash(self, file_path: str, encoding: str) -> Optional[str]:
+    def _calculate_file_hash(self, file_path: str, encoding: Optional[str] = None) -> Optional[str]:
         """
-        计算文件内容哈希（不读取完整内容到内存）
+        计算文件内容哈希（按原始字节计算，整个循环在C层完成）
         
         Args:
             file_path: 文件路径
-            encoding: 文件编码
+            encoding: 保留参数，哈希按原始字节计算，不再依赖编码
             
         Returns:
-            文件内容的MD5哈希值，如果计算失败返回None
+            带算法前缀的内容哈希值，如果计算失败返回None
         """
         try:
-            hash_md5 = hashlib.md5()
-            
-            with open(file_path, 'r', encoding=encoding, errors='ignore') as f:
-                # 分块读取并计算哈希，避免大文件内存问题
-                chunk_size = 65536
-                while True:
-                    chunk = f.read(chunk_size)
-                    if not chunk:
-                        break
-                    hash_md5.update(chunk.encode('utf-8'))
-            
-            return hash_md5.hexdigest()
+            # 大文件由blake3自行映射并多线程计算，小文件一次读入，避免Python层分块循环
+            return _file_content_hash(file_path, self.direct_io, self.baseline_mode)
             
         except Exception as e:
-            print(f"计算文件哈希失败 {file_path}: {e}")
+            logger.warning("计算文件哈希失败 %s: %s", file_path, e)
             return None
     
     
@@ -294,9 +997,9 @@ class TextScanner:
         获取支持的文件扩展名
         
         Returns:
-            支持的扩展名集合
+            支持的扩展名集合（包含点号，如'.txt'）
         """
-        return self.SUPPORTED_EXTENSIONS.copy()
+        return {'.' + ext for ext in self.SUPPORTED_EXTENSIONS}
     
     def add_extension(self, extension: str):
         """
@@ -306,7 +1009,7 @@ class TextScanner:
             extension: 文件扩展名（包含点号，如'.txt'）
         """
         if extension.startswith('.'):
-            self.SUPPORTED_EXTENSIONS.add(extension.lower())
+            self.SUPPORTED_EXTENSIONS = self.SUPPORTED_EXTENSIONS | {extension[1:].lower()}
     
     def remove_extension(self, extension: str):
         """
@@ -315,4 +1018,5 @@ class TextScanner:
         Args:
             extension: 文件扩展名（包含点号，如'.txt'）
         """
-        self.SUPPORTED_EXTENSIONS.discard(extension.lower())
\ No newline at end of file
+        self.SUPPORTED_EXTENSIONS = self.SUPPORTED_EXTENSIONS - {extension.lstrip('.').lower()}
+
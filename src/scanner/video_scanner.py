@@ -6,11 +6,84 @@ Video File Scanner
 """
 
 import os
+import json
+import mmap
+import logging
+import shutil
+import struct
+import subprocess
 import cv2
 from pathlib import Path
-from typing import List, Dict, Any
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
+from typing import List, Dict, Any, Optional, Iterator, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+
+from scanner.scan_result import ScanResult
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# ffprobe可执行文件路径，未安装时为None，回退到OpenCV
+_FFPROBE = shutil.which('ffprobe')
+
+# Windows下调用ffprobe时不弹出控制台窗口
+_SUBPROCESS_FLAGS = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+
+# 基于ISO BMFF（MP4）容器的格式，可直接从stts atom读取帧数
+_MP4_FORMATS = frozenset({'.mp4', '.mov', '.m4v', '.3gp'})
+
+
+def _iter_mp4_atoms(buf, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    """
+    遍历[start, end)范围内的同级atom
+    
+    Args:
+        buf: 文件映射对象
+        start: 起始偏移
+        end: 结束偏移
+        
+    Yields:
+        (atom类型, 内容起始偏移, 内容结束偏移) 元组
+    """
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from('>I4s', buf, pos)
+        header = 8
+        if size == 1:
+            # 64位扩展大小
+            if pos + 16 > end:
+                return
+            size = struct.unpack_from('>Q', buf, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            # 大小为0表示延伸到末尾
+            size = end - pos
+        if size < header:
+            return
+        yield kind, pos + header, min(pos + size, end)
+        pos += size
+
+
+def _find_mp4_atom(buf, start: int, end: int, *path: bytes) -> Optional[Tuple[int, int]]:
+    """
+    按路径逐层查找atom
+    
+    Args:
+        buf: 文件映射对象
+        start: 起始偏移
+        end: 结束偏移
+        path: 逐层的atom类型，如(b'mdia', b'minf', b'stbl')
+        
+    Returns:
+        (内容起始偏移, 内容结束偏移) 元组，找不到时返回None
+    """
+    for kind in path:
+        for atom_kind, atom_start, atom_end in _iter_mp4_atoms(buf, start, end):
+            if atom_kind == kind:
+                start, end = atom_start, atom_end
+                break
+        else:
+            return None
+    return start, end
 
 class VideoScanner:
     """视频文件扫描器"""
@@ -24,7 +97,6 @@ class VideoScanner:
     def __init__(self, max_workers: int = 4):
         """初始化扫描器"""
         self.max_workers = max_workers
-        self._lock = threading.Lock()
         
     def scan_directory(self, directory_path: str, progress_callback=None) -> List[Dict[str, Any]]:
         """
@@ -40,15 +112,11 @@ class VideoScanner:
         video_files = []
         
         try:
-            directory = Path(directory_path)
-            if not directory.exists():
+            if not os.path.exists(directory_path):
                 return video_files
             
             # 第一步：快速收集所有视频文件路径
-            video_paths = []
-            for file_path in directory.rglob('*'):
-                if file_path.is_file() and self.is_video_file(file_path):
-                    video_paths.append(file_path)
+            video_paths = list(self._iter_videos(directory_path))
             
             if not video_paths:
                 return video_files
@@ -57,39 +125,71 @@ class VideoScanner:
             video_files = self._parallel_get_video_info(video_paths, progress_callback)
                         
         except Exception as e:
-            print(f"扫描目录 {directory_path} 时发生错误: {e}")
+            logger.warning("扫描目录 %s 时发生错误: %s", directory_path, e)
             
         return video_files
         
-    def _parallel_get_video_info(self, video_paths: List[Path], progress_callback=None) -> List[Dict[str, Any]]:
+    def scan(self, directory_path: str, progress_callback=None) -> ScanResult:
+        """
+        扫描目录中的视频文件，返回列式的扫描结果（可直接按大小、时长过滤）
+        
+        Args:
+            directory_path: 目录路径
+            progress_callback: 进度回调函数
+            
+        Returns:
+            扫描结果
+        """
+        return ScanResult.from_files(self.scan_directory(directory_path, progress_callback))
+        
+    def _iter_videos(self, root: str) -> Iterator[str]:
+        """
+        遍历目录树，产出视频文件路径
+        
+        使用os.scandir，DirEntry的类型判断来自目录项本身，不会对每个文件额外stat；
+        指向文件的符号链接按其目标文件处理，指向目录的符号链接不进入，避免循环
+        
+        Args:
+            root: 目录路径
+            
+        Yields:
+            视频文件路径
+        """
+        formats = self.SUPPORTED_FORMATS
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif entry.is_file():
+                                name = entry.name
+                                dot = name.rfind('.')
+                                if dot >= 0 and name[dot:].lower() in formats:
+                                    yield entry.path
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+    
+    def _parallel_get_video_info(self, video_paths: List[str], progress_callback=None) -> List[Dict[str, Any]]:
         """并行获取视频信息"""
         video_files = []
-        processed_count = 0
         total_count = len(video_paths)
         
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # 提交所有任务
-            future_to_path = {
-                executor.submit(self.get_video_info_fast, path): path 
-                for path in video_paths
-            }
-            
-            # 处理完成的任务
-            for future in as_completed(future_to_path):
-                path = future_to_path[future]
-                try:
-                    file_info = future.result()
-                    if file_info:
-                        with self._lock:
-                            video_files.append(file_info)
-                        
-                    processed_count += 1
-                    if progress_callback and processed_count % 10 == 0:  # 每10个文件更新一次进度
-                        progress = int((processed_count / total_count) * 30)  # 扫描阶段占30%进度
-                        progress_callback(progress, f"已扫描 {processed_count}/{total_count} 个文件")
-                        
-                except Exception as e:
-                    print(f"处理文件 {path} 时发生错误: {e}")
+            # 结果在主线程中按顺序取回，无需加锁
+            results = executor.map(self.get_video_info_fast, video_paths)
+            for processed_count, file_info in enumerate(results, 1):
+                if file_info:
+                    video_files.append(file_info)
+                
+                if progress_callback and processed_count % 10 == 0:  # 每10个文件更新一次进度
+                    progress = int((processed_count / total_count) * 30)  # 扫描阶段占30%进度
+                    progress_callback(progress, f"已扫描 {processed_count}/{total_count} 个文件")
         
         return video_files
         
@@ -133,10 +233,10 @@ class VideoScanner:
             return file_info
             
         except Exception as e:
-            print(f"获取文件信息失败 {file_path}: {e}")
+            logger.warning("获取文件信息失败 %s: %s", file_path, e)
             return None
             
-    def get_video_info_fast(self, file_path: Path) -> Dict[str, Any]:
+    def get_video_info_fast(self, file_path: str) -> Dict[str, Any]:
         """
         快速获取视频文件信息（优化版本）
         
@@ -148,13 +248,14 @@ class VideoScanner:
         """
         try:
             # 获取基本文件信息
-            stat = file_path.stat()
+            file_path = os.fspath(file_path)
+            stat = os.stat(file_path)
             file_info = {
-                'path': str(file_path),
-                'name': file_path.name,
+                'path': file_path,
+                'name': os.path.basename(file_path),
                 'size': stat.st_size,
                 'mtime': stat.st_mtime,
-                'extension': file_path.suffix.lower()
+                'extension': os.path.splitext(file_path)[1].lower()
             }
             
             # 快速获取视频元数据
@@ -164,10 +265,10 @@ class VideoScanner:
             return file_info
             
         except Exception as e:
-            print(f"获取文件信息失败 {file_path}: {e}")
+            logger.warning("获取文件信息失败 %s: %s", file_path, e)
             return None
     
-    def get_video_metadata_fast(self, file_path: Path) -> Dict[str, Any]:
+    def get_video_metadata_fast(self, file_path: str) -> Dict[str, Any]:
         """
         快速获取视频元数据（优化版本）
         
@@ -177,6 +278,11 @@ class VideoScanner:
         Returns:
             视频元数据字典
         """
+        # 优先用ffprobe只读取容器元数据，不初始化解码器
+        metadata = self._ffprobe_metadata(file_path)
+        if metadata is not None:
+            return metadata
+        
         metadata = {
             'width': 0,
             'height': 0,
@@ -185,6 +291,11 @@ class VideoScanner:
             'frame_count': 0
         }
         
+        # MP4类容器的帧数直接从索引读取，避免OpenCV扫描整个文件
+        container_frame_count = 0
+        if os.path.splitext(file_path)[1].lower() in _MP4_FORMATS:
+            container_frame_count = self._parse_mp4_frame_count(file_path)
+        
         try:
             # 使用OpenCV快速获取视频信息，但不读取帧数据
             cap = cv2.VideoCapture(str(file_path))
@@ -197,12 +308,12 @@ class VideoScanner:
                 
                 # 对于大文件，帧数获取可能很慢，使用估算方法
                 try:
-                    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                    frame_count = container_frame_count or int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
                     if frame_count > 0:
                         metadata['frame_count'] = frame_count
                     else:
                         # 如果无法获取帧数，使用文件大小估算
-                        file_size_mb = file_path.stat().st_size / (1024 * 1024)
+                        file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
                         estimated_duration = file_size_mb / 2  # 粗略估算：2MB/秒
                         metadata['frame_count'] = int(estimated_duration * metadata['fps']) if metadata['fps'] > 0 else 0
                 except:
@@ -214,16 +325,115 @@ class VideoScanner:
                     metadata['duration'] = metadata['frame_count'] / metadata['fps']
                 else:
                     # 尝试通过文件大小估算时长
-                    file_size_mb = file_path.stat().st_size / (1024 * 1024)
+                    file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
                     metadata['duration'] = max(1, file_size_mb / 2)  # 粗略估算
                     
                 cap.release()
                 
         except Exception as e:
-            print(f"获取视频元数据失败 {file_path}: {e}")
+            logger.warning("获取视频元数据失败 %s: %s", file_path, e)
             
         return metadata
 
+    def _ffprobe_metadata(self, file_path: Path) -> Optional[Dict[str, Any]]:
+        """
+        使用ffprobe读取视频元数据（只解析容器信息，不打开解码器）
+        
+        Args:
+            file_path: 视频文件路径
+            
+        Returns:
+            视频元数据字典，ffprobe不可用或解析失败时返回None
+        """
+        if _FFPROBE is None:
+            return None
+        
+        try:
+            result = subprocess.run(
+                [_FFPROBE, '-v', 'error', '-select_streams', 'v:0',
+                 '-show_entries', 'stream=width,height,avg_frame_rate,nb_frames,duration:format=duration',
+                 '-of', 'json', str(file_path)],
+                capture_output=True, timeout=30, creationflags=_SUBPROCESS_FLAGS
+            )
+            if result.returncode != 0:
+                return None
+            
+            probe = json.loads(result.stdout)
+            streams = probe.get('streams') or []
+            if not streams:
+                return None
+            stream = streams[0]
+            
+            # 帧率格式为"分子/分母"，如"30000/1001"
+            num, _, den = str(stream.get('avg_frame_rate', '0/0')).partition('/')
+            fps = float(num) / float(den) if den and float(den) else 0.0
+            
+            # MKV等容器的流信息里通常没有时长和帧数，使用容器时长推算
+            duration = float(stream.get('duration') or 
+                             probe.get('format', {}).get('duration') or 0)
+            frame_count = int(stream.get('nb_frames') or 0)
+            if frame_count <= 0 and duration > 0:
+                frame_count = int(duration * fps)
+            if duration <= 0 and fps > 0:
+                duration = frame_count / fps
+            
+            return {
+                'width': int(stream.get('width') or 0),
+                'height': int(stream.get('height') or 0),
+                'duration': duration,
+                'fps': fps,
+                'frame_count': frame_count
+            }
+            
+        except (OSError, subprocess.SubprocessError, ValueError) as e:
+            logger.warning("ffprobe读取元数据失败 %s: %s", file_path, e)
+            return None
+    
+    def _parse_mp4_frame_count(self, file_path: str) -> int:
+        """
+        从MP4/MOV容器的stts atom读取视频轨道帧数
+        
+        只读取moov中的索引信息，与文件长度无关
+        
+        Args:
+            file_path: 视频文件路径
+            
+        Returns:
+            帧数，无法解析时返回0
+        """
+        try:
+            with open(file_path, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                moov = _find_mp4_atom(mm, 0, len(mm), b'moov')
+                if moov is None:
+                    return 0
+                
+                for kind, trak_start, trak_end in _iter_mp4_atoms(mm, *moov):
+                    if kind != b'trak':
+                        continue
+                    
+                    # hdlr内容：version/flags(4) + pre_defined(4) + handler_type(4)
+                    hdlr = _find_mp4_atom(mm, trak_start, trak_end, b'mdia', b'hdlr')
+                    if hdlr is None or mm[hdlr[0] + 8:hdlr[0] + 12] != b'vide':
+                        continue
+                    
+                    stts = _find_mp4_atom(mm, trak_start, trak_end, 
+                                          b'mdia', b'minf', b'stbl', b'stts')
+                    if stts is None:
+                        return 0
+                    
+                    # stts内容：version/flags(4) + entry_count(4) + (sample_count, sample_delta)*N
+                    stts_start, stts_end = stts
+                    entry_count = struct.unpack_from('>I', mm, stts_start + 4)[0]
+                    entry_count = min(entry_count, (stts_end - stts_start - 8) // 8)
+                    entries = mm[stts_start + 8:stts_start + 8 + entry_count * 8]
+                    return sum(count for count, _ in struct.iter_unpack('>II', entries))
+                
+        except (OSError, ValueError, struct.error):
+            pass
+        
+        return 0
+    
     def get_video_metadata(self, file_path: Path) -> Dict[str, Any]:
         """
         获取视频元数据
@@ -234,6 +444,10 @@ class VideoScanner:
         Returns:
             视频元数据字典
         """
+        metadata = self._ffprobe_metadata(file_path)
+        if metadata is not None:
+            return metadata
+        
         metadata = {
             'width': 0,
             'height': 0,
@@ -260,7 +474,7 @@ class VideoScanner:
                 cap.release()
                 
         except Exception as e:
-            print(f"获取视频元数据失败 {file_path}: {e}")
+            logger.warning("获取视频元数据失败 %s: %s", file_path, e)
             
         return metadata
         
@@ -282,58 +496,40 @@ class VideoScanner:
             
         return all_video_files
         
-    def filter_by_size(self, video_files: List[Dict[str, Any]], 
-                      min_size: int = 0, max_size: int = None) -> List[Dict[str, Any]]:
+    def filter_by_size(self, video_files: Union[List[Dict[str, Any]], ScanResult], 
+                      min_size: int = 0, max_size: int = None) -> Union[List[Dict[str, Any]], ScanResult]:
         """
         按文件大小过滤
         
         Args:
-            video_files: 视频文件列表
+            video_files: 视频文件列表，或列式的ScanResult（返回同类型结果）
             min_size: 最小文件大小（字节）
             max_size: 最大文件大小（字节）
             
         Returns:
             过滤后的视频文件列表
         """
-        filtered_files = []
+        if isinstance(video_files, ScanResult):
+            return video_files.filter_by_size(min_size, max_size)
+        if max_size is None:
+            return [f for f in video_files if f.get('size', 0) >= min_size]
+        return [f for f in video_files if min_size <= f.get('size', 0) <= max_size]
         
-        for file_info in video_files:
-            file_size = file_info.get('size', 0)
-            
-            if file_size < min_size:
-                continue
-                
-            if max_size is not None and file_size > max_size:
-                continue
-                
-            filtered_files.append(file_info)
-            
-        return filtered_files
-        
-    def filter_by_duration(self, video_files: List[Dict[str, Any]], 
-                          min_duration: float = 0, max_duration: float = None) -> List[Dict[str, Any]]:
+    def filter_by_duration(self, video_files: Union[List[Dict[str, Any]], ScanResult], 
+                          min_duration: float = 0, max_duration: float = None) -> Union[List[Dict[str, Any]], ScanResult]:
         """
         按视频时长过滤
         
         Args:
-            video_files: 视频文件列表
+            video_files: 视频文件列表，或列式的ScanResult（返回同类型结果）
             min_duration: 最小时长（秒）
             max_duration: 最大时长（秒）
             
         Returns:
             过滤后的视频文件列表
         """
-        filtered_files = []
-        
-        for file_info in video_files:
-            duration = file_info.get('duration', 0)
-            
-            if duration < min_duration:
-                continue
-                
-            if max_duration is not None and duration > max_duration:
-                continue
-                
-            filtered_files.append(file_info)
-            
-        return filtered_files
\ No newline at end of file
+        if isinstance(video_files, ScanResult):
+            return video_files.filter_by_duration(min_duration, max_duration)
+        if max_duration is None:
+            return [f for f in video_files if f.get('duration', 0) >= min_duration]
+        return [f for f in video_files if min_duration <= f.get('duration', 0) <= max_duration]
\ No newline at end of file
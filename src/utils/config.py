@@ -7,8 +7,30 @@ Configuration Management
 
 import json
 import os
+import threading
+import types
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable, Mapping
+
+try:
+    import orjson  # 可选依赖，C实现的JSON序列化
+except ImportError:
+    orjson = None
+
+
+def _dumps(data: Dict[str, Any]) -> bytes:
+    """将配置序列化为UTF-8编码的JSON字节串"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def _loads(data: bytes) -> Any:
+    """解析JSON字节串"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data.decode('utf-8'))
 
 class Config:
     """配置管理器"""
@@ -42,26 +64,54 @@ class Config:
             self.config_file = Path(config_file)
             
         self.config = self.DEFAULT_CONFIG.copy()
+        # 只读视图直接绑定在self.config上，因此self.config只能原地修改，不能重新赋值
+        self._view = types.MappingProxyType(self.config)
+        self._dirty = False  # 内存中的配置是否有尚未保存的修改
+        self._save_lock = threading.Lock()  # 配置可能在后台线程中保存
+        self._batch_depth = 0  # 大于0时推迟保存，直到batch()退出
+        self._file_mtime = None  # 最近一次读取或写入时配置文件的修改时间
         self.load_config()
         
     def load_config(self):
-        """加载配置"""
+        """加载配置（文件自上次读写后未变化时跳过）"""
+        try:
+            mtime = os.stat(self.config_file).st_mtime_ns
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            print(f"加载配置文件失败: {e}")
+            return
+        
+        if mtime == self._file_mtime:
+            return
+        
         try:
-            if self.config_file.exists():
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    loaded_config = json.load(f)
-                    self.config.update(loaded_config)
+            loaded_config = _loads(self.config_file.read_bytes())
+            self.config.update(loaded_config)
+            self._file_mtime = mtime
         except Exception as e:
             print(f"加载配置文件失败: {e}")
             
     def save_config(self):
-        """保存配置"""
-        try:
-            self.config_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"保存配置文件失败: {e}")
+        """保存配置（线程安全，batch()期间推迟到退出时执行）"""
+        if self._batch_depth > 0:
+            self._dirty = True
+            return
+        
+        with self._save_lock:
+            # 先复制一份，避免写入过程中配置被其他线程修改
+            config_data = self.config.copy()
+            self._dirty = False
+            # 先写入临时文件再替换，避免中途崩溃留下不完整的配置文件
+            tmp_file = self.config_file.with_suffix('.json.tmp')
+            try:
+                self.config_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file.write_bytes(_dumps(config_data))
+                os.replace(tmp_file, self.config_file)
+                self._file_mtime = os.stat(self.config_file).st_mtime_ns
+            except Exception as e:
+                self._dirty = True
+                print(f"保存配置文件失败: {e}")
             
     def get(self, key: str, default: Any = None) -> Any:
         """
@@ -85,22 +135,59 @@ class Config:
             value: 配置值
         """
         self.config[key] = value
+        self._dirty = True
         
-    def update(self, config_dict: Dict[str, Any]):
+    def update(self, config_dict: Dict[str, Any]) -> Dict[str, Any]:
         """
-        批量更新配置
+        批量更新配置（只修改内存中的配置，保存由调用方或batch(flush=...)负责）
         
         Args:
             config_dict: 配置字典
+            
+        Returns:
+            实际发生变化的配置项
         """
-        self.config.update(config_dict)
+        changes = {key: value for key, value in config_dict.items()
+                   if key not in self.config or self.config[key] != value}
+        if changes:
+            self.config.update(changes)
+            self._dirty = True
+        return changes
+        
+    @contextmanager
+    def batch(self, flush: Optional[Callable[[], None]] = None):
+        """
+        批量修改配置，期间只修改内存中的配置，退出时如有修改再统一保存一次
+        
+        Args:
+            flush: 退出时用于保存配置的函数，默认为save_config
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+        
+        if self._batch_depth == 0 and self._dirty:
+            (flush or self.save_config)()
         
     def reset_to_default(self):
         """重置为默认配置"""
-        self.config = self.DEFAULT_CONFIG.copy()
+        self.config.clear()
+        self.config.update(self.DEFAULT_CONFIG)
+        self._dirty = True
+        
+    def view(self) -> Mapping[str, Any]:
+        """
+        获取配置的只读视图（不复制，随配置修改实时更新）
+        
+        Returns:
+            只读配置映射
+        """
+        return self._view
         
     def get_all(self) -> Dict[str, Any]:
-        """获取所有配置"""
+        """获取所有配置的副本（需要独立快照时使用）"""
         return self.config.copy()
 
 # 全局配置实例
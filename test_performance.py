@@ -6,20 +6,30 @@ Performance Test Script
 """
 
 import os
+import sys
 import time
 import tempfile
-from src.scanner.text_scanner import TextScanner
+
+# 添加src目录到路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from scanner.text_scanner import TextScanner
+
+# 内存文件系统目录（Linux），测试文件写在内存中，测量结果不受磁盘写入延迟影响
+RAMDISK_DIR = '/dev/shm'
 
 def create_test_files(num_files=100):
-    """创建测试文件"""
-    test_dir = tempfile.mkdtemp(prefix="dupfinder_test_")
+    """创建测试文件（优先创建在内存文件系统中，不可用时使用系统临时目录）"""
+    ramdisk = RAMDISK_DIR if os.path.isdir(RAMDISK_DIR) and os.access(RAMDISK_DIR, os.W_OK) else None
+    test_dir = tempfile.mkdtemp(prefix="dupfinder_test_", dir=ramdisk)
     
+    prefix = test_dir + os.sep
     for i in range(num_files):
-        file_path = os.path.join(test_dir, f"test_file_{i}.txt")
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(f"这是测试文件 {i}\n" * (i + 1))
-            f.write("一些共同的内容\n")
-            f.write(f"文件编号：{i}\n")
+        file_path = f"{prefix}test_file_{i}.txt"
+        # 先在内存中拼好完整内容，每个文件只做一次写入
+        content = f"这是测试文件 {i}\n" * (i + 1) + "一些共同的内容\n" + f"文件编号：{i}\n"
+        with open(file_path, 'wb') as f:
+            f.write(content.encode('utf-8'))
     
     return test_dir
 
@@ -41,7 +51,7 @@ def test_scanning_performance():
     print("开始扫描...")
     start_time = time.time()
     
-    files = scanner.scan_directory(test_dir, progress_callback=progress_callback)
+    files = scanner.scan_directory(test_dir, progress_callback=progress_callback, load_details=True)
     
     end_time = time.time()
     elapsed_time = end_time - start_time
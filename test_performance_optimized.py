@@ -38,7 +38,8 @@ def test_performance(test_directory: str):
     print("\n[阶段1] 扫描文件")
     scan_start = time.time()
     
-    text_files = scanner.scan_directory(test_directory, progress_callback)
+    scan_result = scanner.scan(test_directory, progress_callback, load_details=True)
+    text_files = scan_result.files
     
     scan_time = time.time() - scan_start
     print(f"[完成] 扫描完成: 找到 {len(text_files)} 个文件，用时 {scan_time:.2f}s")
@@ -47,8 +48,8 @@ def test_performance(test_directory: str):
         print("[错误] 没有找到文本文件")
         return
     
-    # 统计文件信息
-    total_size = sum(f.get('size', 0) for f in text_files)
+    # 统计文件信息（扫描时已累计）
+    total_size = scan_result.total_bytes
     print(f"[统计] 文件统计: {len(text_files)} 个文件，总大小 {total_size / (1024*1024):.1f} MB")
     
     # 第二阶段：重复检测
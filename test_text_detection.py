@@ -26,7 +26,7 @@ def test_text_duplicate_detection():
         return
     
     print(f"扫描目录: {test_dir}")
-    text_files = scanner.scan_directory(test_dir)
+    text_files = scanner.scan_directory(test_dir, load_details=True)
     
     print(f"找到 {len(text_files)} 个文本文件:")
     for file_info in text_files:
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文本扫描器测试脚本
+"""
+
+import sys
+import os
+import copy
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from scanner import text_scanner
+from scanner.text_scanner import TextScanner
+
+def _create_files(directory):
+    """创建不同编码的测试文件"""
+    contents = {
+        'utf8.txt': ('第一行\nsecond line\n' * 20, 'utf-8'),
+        'utf8_bom.md': ('带BOM的文件\n' * 10, 'utf-8-sig'),
+        'utf16.txt': ('UTF-16 text\n' * 10, 'utf-16'),
+        'utf32.log': ('UTF-32 text\n' * 10, 'utf-32'),
+        'copy.txt': ('第一行\nsecond line\n' * 20, 'utf-8'),
+    }
+    for name, (text, encoding) in contents.items():
+        with open(os.path.join(directory, name), 'w', encoding=encoding, newline='') as f:
+            f.write(text)
+
+def test_ensure_many_matches_ensure_file_details():
+    """测试批量加载与逐个加载得到相同的文件信息"""
+    with tempfile.TemporaryDirectory() as directory:
+        _create_files(directory)
+        scanner = TextScanner(pool_min_files=2)
+
+        file_infos = [scanner._get_file_info(os.path.join(directory, name))
+                      for name in sorted(os.listdir(directory))]
+        serial = copy.deepcopy(file_infos)
+        for file_info in serial:
+            assert scanner.ensure_file_details(file_info)
+
+        assert scanner.ensure_many(file_infos, max_workers=2) == len(file_infos)
+        assert file_infos == serial
+
+        # UTF-16/UTF-32按码点统计，而不是按字节统计
+        utf16 = next(info for info in file_infos if info['name'] == 'utf16.txt')
+        assert utf16['encoding'] == 'utf-16'
+        assert utf16['char_count'] == len('UTF-16 text\n' * 10)
+
+def test_scan_matches_serial_scan():
+    """测试进程池扫描与单进程扫描得到相同的文件信息"""
+    with tempfile.TemporaryDirectory() as directory:
+        _create_files(directory)
+
+        key = lambda file_info: file_info['path']
+        serial = sorted(TextScanner(max_workers=1).scan_directory(directory, load_details=True),
+                        key=key)
+        pooled = sorted(TextScanner(max_workers=2, pool_min_files=2).scan_directory(
+            directory, load_details=True), key=key)
+
+        assert len(serial) == 5
+        assert pooled == serial
+
+def test_detect_gbk_encoding():
+    """测试GBK编码的中文文件按GB18030读取，内容可原样还原"""
+    texts = {
+        'short.txt': '你好，世界',
+        'lines.txt': '这是一个中文测试文件，用于检测编码。\n' * 20,
+        'traditional.txt': '這是繁體中文的測試文件。',
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        scanner = TextScanner()
+        for name, text in texts.items():
+            path = os.path.join(directory, name)
+            with open(path, 'wb') as f:
+                f.write(text.encode('gbk'))
+
+            file_info = scanner._get_file_info(path)
+            assert scanner.ensure_file_details(file_info)
+            assert file_info['encoding'] == 'gb18030'
+            with open(path, 'r', encoding=file_info['encoding']) as f:
+                assert f.read() == text
+
+def test_scan_is_lazy_by_default():
+    """测试默认扫描只获取基本信息，不计算哈希"""
+    with tempfile.TemporaryDirectory() as directory:
+        _create_files(directory)
+
+        text_files = TextScanner().scan_directory(directory)
+        assert len(text_files) == 5
+        assert all(file_info['content_hash'] is None for file_info in text_files)
+
+def test_pool_marks_failed_file():
+    """测试进程池中单个文件出错时只标记该文件失败，不中断整个扫描"""
+    with tempfile.TemporaryDirectory() as directory:
+        _create_files(directory)
+        scanner = TextScanner(max_workers=2, pool_min_files=2)
+        file_infos = [scanner._get_file_info(os.path.join(directory, name))
+                      for name in sorted(os.listdir(directory))]
+
+        # 扫描后文件被截断为空
+        with open(file_infos[0]['path'], 'wb'):
+            pass
+        os.remove(file_infos[1]['path'])
+
+        assert scanner.ensure_many(file_infos) == len(file_infos) - 1
+        assert file_infos[1]['content_hash'] is None
+        assert all(info['content_hash'] is not None for info in file_infos[2:])
+
+        # 读取过程中抛出的非OSError异常（如映射时文件已被截断为空）同样只影响该文件
+        original = text_scanner._hash_and_stat
+        def truncated(path, *args):
+            raise ValueError("cannot mmap an empty file")
+        text_scanner._hash_and_stat = truncated
+        try:
+            file_info = text_scanner._load_file_details(dict(file_infos[0], content_hash=None))
+        finally:
+            text_scanner._hash_and_stat = original
+        assert file_info['content_hash'] is None
+
+if __name__ == "__main__":
+    test_ensure_many_matches_ensure_file_details()
+    test_scan_matches_serial_scan()
+    test_detect_gbk_encoding()
+    test_scan_is_lazy_by_default()
+    test_pool_marks_failed_file()
+    print("测试通过")